@@ -0,0 +1,55 @@
+import collections
+
+"""
+    AllocationCache remembers the shipments of recent orders, so an order that was already allocated
+    (such as the same single item order placed over and over) is answered without splitting it again.
+
+    The shipment of an order only depends on the stock of the items it orders, so every shipment is stored
+    with the version of each of those items (see Catalog.get_version) when it was allocated. A cached
+    shipment is only used while those versions are unchanged, so a change of stock only invalidates the
+    orders of the items it changed.
+
+    A cache belongs to the catalog it was created for, as the versions of one catalog say nothing about the
+    stock of another, and InventoryAllocator only takes a cache created for its own catalog.
+
+    Orders are keyed by their lines in order, as the order of the lines decides the order of the shipment.
+    The maxSize least recently used orders are kept. Cached shipments are shared between the orders that
+    get them and must not be modified.
+"""
+class AllocationCache:
+    def __init__(self, catalog, maxSize=10000):
+        self.catalog = catalog
+        self.maxSize = maxSize
+
+        # entries[order lines] = (versions of the ordered items, shipment), least recently used first
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def allocate(self, order, allocate):
+        # the cached shipment of order if its items have not changed, otherwise allocate(order), which is then cached.
+        # allocate must allocate against the catalog of the cache
+        key = tuple(order.items())
+        versions = tuple(self.catalog.get_version(itemName) for itemName in order)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == versions:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        shipment = allocate(order)
+
+        self.entries[key] = (versions, shipment)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+        return shipment
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return { 'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'hitRate': self.hits / lookups if lookups else 0.0 }
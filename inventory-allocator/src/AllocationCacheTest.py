@@ -0,0 +1,79 @@
+import unittest
+from AllocationCache import AllocationCache
+from AllocationEngine import AllocationEngine
+from Catalog import Catalog
+from CompactCatalog import CompactCatalog
+from InventoryAllocator import InventoryAllocator
+
+class AllocationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 10 } },
+            { 'name': 'dm', 'inventory': { 'banana': 5, 'orange': 10 } }]
+        self.catalog = Catalog(self.warehouseDistributionList)
+        self.cache = AllocationCache(self.catalog, maxSize=2)
+        self.inventoryAllocator = InventoryAllocator.from_catalog(self.catalog, cache=self.cache)
+
+    # the same order is only allocated once while its items do not change
+    def test_repeated_order_hits(self):
+        for _ in range(3):
+            self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'apple': 1 }), [{ 'owd': { 'apple': 1 } }])
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 1))
+        self.assertEqual(self.cache.get_stats()['hitRate'], 2 / 3)
+
+    # a change of stock only invalidates the orders of the items it changed
+    def test_stock_change_invalidates_affected_orders(self):
+        self.inventoryAllocator.allocate_inventory({ 'apple': 1 })
+        self.inventoryAllocator.allocate_inventory({ 'orange': 12 })
+
+        self.catalog.adjust_amount('owd', 'orange', -10)
+
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'orange': 12 }), [])
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'apple': 1 }), [{ 'owd': { 'apple': 1 } }])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 3))
+
+    # orders that are not in the catalog yet are invalidated when their items are added
+    def test_new_item_invalidates(self):
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'kiwi': 1 }), [])
+
+        self.catalog.adjust_amount('dm', 'kiwi', 1)
+
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'kiwi': 1 }), [{ 'dm': { 'kiwi': 1 } }])
+
+    # only the maxSize most recently used orders are kept
+    def test_least_recently_used_order_is_evicted(self):
+        self.inventoryAllocator.allocate_inventory({ 'apple': 1 })
+        self.inventoryAllocator.allocate_inventory({ 'apple': 2 })
+        self.inventoryAllocator.allocate_inventory({ 'apple': 1 })
+        self.inventoryAllocator.allocate_inventory({ 'apple': 3 })
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(list(self.cache.entries), [(('apple', 1),), (('apple', 3),)])
+
+    # the order of the lines is part of the key, as it decides the order of the shipment
+    def test_line_order_is_kept(self):
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'banana': 1, 'apple': 1 }), [{ 'dm': { 'banana': 1 } }, { 'owd': { 'apple': 1 } }])
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'apple': 1, 'banana': 1 }), [{ 'owd': { 'apple': 1 } }, { 'dm': { 'banana': 1 } }])
+        self.assertEqual(self.cache.hits, 0)
+
+    # a CompactCatalog keeps versions too, so an engine allocating against it never gets a stale shipment
+    def test_compact_catalog_versions(self):
+        compactCatalog = CompactCatalog(self.warehouseDistributionList)
+        inventoryAllocator = InventoryAllocator.from_catalog(compactCatalog, cache=AllocationCache(compactCatalog))
+        engine = AllocationEngine(compactCatalog)
+
+        self.assertEqual(inventoryAllocator.allocate_inventory({ 'apple': 5 }), [{ 'owd': { 'apple': 5 } }])
+        engine.allocate({ 'apple': 5 })
+        self.assertEqual(inventoryAllocator.allocate_inventory({ 'apple': 5 }), [])
+
+    # a cache only serves the catalog it was created for, shipments of another catalog are never returned
+    def test_cache_belongs_to_its_catalog(self):
+        otherCatalog = Catalog([{ 'name': 'dm', 'inventory': { 'apple': 5 } }])
+
+        self.assertRaises(ValueError, InventoryAllocator.from_catalog, otherCatalog, cache=self.cache)
+        self.assertRaises(ValueError, InventoryAllocator, { 'apple': 1 }, self.warehouseDistributionList, cache=self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
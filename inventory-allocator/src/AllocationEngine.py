@@ -0,0 +1,97 @@
+import contextlib
+import itertools
+import threading
+
+from InventoryAllocator import InventoryAllocator
+from InventoryDeltaFeed import apply_delta, iter_deltas
+
+"""
+    The AllocationEngine runs the allocator against live stock.
+
+    InventoryAllocator on its own never consumes stock, every order sees the same catalog. The engine
+    takes the stock of a shipment out of the catalog as soon as it is reserved, so the next order only
+    sees what is left. A reservation is then either committed (the stock stays taken) or released
+    (the stock goes back to the warehouses it came from).
+
+    Every update only touches the (warehouse, item) pairs of the shipment, see Catalog.adjust_amount
+
+    The engine can be shared by several threads. Every item is guarded by one of a fixed number of locks
+    (lockCount, picked by the hash of its name), and an order holds the locks of all its items from the
+    moment it reads the catalog until its shipment has been taken out, so two orders can never be given the
+    same stock. Orders for different items rarely wait on each other, only when their items share a lock.
+    Locks are always taken in index order, so orders sharing items cannot deadlock, and the number of locks
+    does not grow with the item names ordered, known to the catalog or not.
+
+    Deltas go through apply_deltas so that they take the lock of their item. add_warehouse and
+    retire_warehouse change every item and must not run while the engine is in use.
+"""
+class AllocationEngine:
+    def __init__(self, catalog, lockCount=64):
+        self.catalog = catalog
+        self.inventoryAllocator = InventoryAllocator.from_catalog(catalog)
+
+        # itemLocks[hash(name of item) % lockCount] = lock held while the stock of the item is read or changed
+        self.itemLocks = [ threading.Lock() for _ in range(lockCount) ]
+
+        # reservations[reservationId] = shipment that is held but not yet committed or released
+        self.reservations = {}
+        self._reservationIds = itertools.count(1)
+
+    @contextlib.contextmanager
+    def _lock_items(self, itemNames):
+        # items sharing a lock take it once
+        locks = [ self.itemLocks[index] for index in sorted({ hash(itemName) % len(self.itemLocks) for itemName in itemNames }) ]
+
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _apply_shipment(self, shipment, sign):
+        for warehouseShipment in shipment:
+            for warehouse, items in warehouseShipment.items():
+                for itemName, itemAmount in items.items():
+                    self.catalog.adjust_amount(warehouse, itemName, sign * itemAmount)
+
+    def reserve(self, order):
+        # returns (reservationId, shipment), reservationId is None when nothing could be allocated
+        # items that are not in the catalog yet are locked too, a delta could add them meanwhile
+        with self._lock_items(order):
+            shipment = self.inventoryAllocator.allocate_inventory(order)
+            if not shipment:
+                return None, shipment
+
+            self._apply_shipment(shipment, -1)
+
+        reservationId = next(self._reservationIds)
+        self.reservations[reservationId] = shipment
+        return reservationId, shipment
+
+    def commit(self, reservationId):
+        # the stock was already taken out when it was reserved, so there is nothing left to update
+        return self.reservations.pop(reservationId)
+
+    def release(self, reservationId):
+        shipment = self.reservations.pop(reservationId)
+        with self._lock_items({ itemName for warehouseShipment in shipment for items in warehouseShipment.values() for itemName in items }):
+            self._apply_shipment(shipment, 1)
+        return shipment
+
+    def apply_deltas(self, lines):
+        # applies inventory feed lines (see InventoryDeltaFeed) while orders are being allocated
+        count = 0
+        for warehouse, itemName, operation, amount in iter_deltas(lines):
+            with self._lock_items((itemName,)):
+                apply_delta(self.catalog, warehouse, itemName, operation, amount)
+            count += 1
+        return count
+
+    def allocate(self, order):
+        # reserve and commit in a single step
+        reservationId, shipment = self.reserve(order)
+        if reservationId is not None:
+            self.commit(reservationId)
+        return shipment
@@ -0,0 +1,133 @@
+import random
+import sys
+import threading
+import unittest
+from AllocationEngine import AllocationEngine
+from Catalog import Catalog
+
+class AllocationEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 3 } }, { 'name': 'dm', 'inventory': { 'apple': 5 } }])
+        self.engine = AllocationEngine(self.catalog)
+
+    # an allocated order takes its stock out of the catalog so the next order only sees what is left
+    def test_allocate_consumes_stock(self):
+        self.assertEqual(self.engine.allocate({ 'apple': 4 }), [{ 'owd': { 'apple': 4 } }])
+        self.assertEqual(self.engine.allocate({ 'apple': 4 }), [{ 'dm': { 'apple': 4 } }])
+        self.assertEqual(self.engine.allocate({ 'apple': 3 }), [])
+        self.assertEqual(self.engine.allocate({ 'apple': 2 }), [{ 'owd': { 'apple': 1 } }, { 'dm': { 'apple': 1 } }])
+
+        self.assertEqual(self.catalog.get_total('apple'), 0)
+        self.assertEqual(self.catalog.get_distribution('apple'), [('owd', 0), ('dm', 0)])
+
+    # a reservation holds stock until it is released
+    def test_release_returns_stock(self):
+        reservationId, shipment = self.engine.reserve({ 'apple': 5, 'orange': 3 })
+
+        self.assertEqual(shipment, [{ 'owd': { 'apple': 5, 'orange': 3 } }])
+        self.assertEqual(self.catalog.get_total('apple'), 5)
+        self.assertEqual(self.engine.reserve({ 'orange': 1 }), (None, []))
+
+        self.engine.release(reservationId)
+
+        self.assertEqual(self.catalog.get_total('apple'), 10)
+        self.assertEqual(self.catalog.get_amount('owd', 'orange'), 3)
+        self.assertEqual(self.engine.reservations, {})
+
+    # committing keeps the stock taken and forgets the reservation
+    def test_commit_keeps_stock_taken(self):
+        reservationId, _ = self.engine.reserve({ 'apple': 10 })
+        self.engine.commit(reservationId)
+
+        self.assertEqual(self.catalog.get_total('apple'), 0)
+        self.assertRaises(KeyError, self.engine.release, reservationId)
+
+    # an order that cannot be filled does not change the stock
+    def test_unfillable_order_leaves_stock(self):
+        self.assertEqual(self.engine.allocate({ 'apple': 4, 'orange': 4 }), [])
+
+        self.assertEqual(self.catalog.get_total('apple'), 10)
+        self.assertEqual(self.catalog.get_total('orange'), 3)
+
+    # deltas applied through the engine change the stock that later orders see
+    def test_apply_deltas(self):
+        self.assertEqual(self.engine.apply_deltas(['owd apple -5', 'dm orange +2']), 2)
+
+        self.assertEqual(self.engine.allocate({ 'apple': 5, 'orange': 5 }), [{ 'dm': { 'apple': 5, 'orange': 2 } }, { 'owd': { 'orange': 3 } }])
+        self.assertEqual(self.catalog.get_total('apple'), 0)
+
+    # ordering items that are not in the catalog does not leave anything behind in the engine
+    def test_unknown_items_do_not_grow_locks(self):
+        for i in range(1000):
+            self.assertEqual(self.engine.reserve({ 'sku%d' % i: 1 }), (None, []))
+
+        self.assertEqual(len(self.engine.itemLocks), 64)
+        self.assertEqual(self.engine.reservations, {})
+
+    # threads allocating, releasing and restocking overlapping items never ship more than there is
+    def test_concurrent_allocation_never_oversells(self):
+        # few items and many orders, so that threads keep changing the same items at the same time and their
+        # stock runs out before the threads are done
+        itemNames = [ 'item%d' % i for i in range(3) ]
+        warehouseNames = [ 'w%d' % i for i in range(4) ]
+        catalog = Catalog([{ 'name': warehouse, 'inventory': { itemName: 5000 for itemName in itemNames } } for warehouse in warehouseNames])
+        engine = AllocationEngine(catalog)
+
+        # shipped[thread][item] and restocked[thread][item], summed once every thread is done
+        shipped = [ dict.fromkeys(itemNames, 0) for _ in range(8) ]
+        restocked = [ dict.fromkeys(itemNames, 0) for _ in range(8) ]
+        errors = []
+        barrier = threading.Barrier(8)
+
+        def run(thread):
+            rng = random.Random(thread)
+            barrier.wait()
+            try:
+                for i in range(3000):
+                    order = { itemName: rng.randint(1, 15) for itemName in rng.sample(itemNames, 2) }
+                    reservationId, shipment = engine.reserve(order)
+                    if reservationId is None:
+                        continue
+
+                    if i % 5 == 0:
+                        engine.release(reservationId)
+                    else:
+                        engine.commit(reservationId)
+                        for warehouseShipment in shipment:
+                            for items in warehouseShipment.values():
+                                for itemName, itemAmount in items.items():
+                                    shipped[thread][itemName] += itemAmount
+
+                    if i % 20 == 0:
+                        itemName = rng.choice(itemNames)
+                        engine.apply_deltas(['%s %s +10' % (rng.choice(warehouseNames), itemName)])
+                        restocked[thread][itemName] += 10
+            except Exception as error:
+                errors.append(error)
+
+        switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [ threading.Thread(target=run, args=(thread,)) for thread in range(8) ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switchInterval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(engine.reservations, {})
+        for itemName in itemNames:
+            initial = 5000 * len(warehouseNames) + sum(threadRestocked[itemName] for threadRestocked in restocked)
+            totalShipped = sum(threadShipped[itemName] for threadShipped in shipped)
+
+            self.assertLessEqual(totalShipped, initial)
+            self.assertEqual(catalog.get_total(itemName), initial - totalShipped)
+            self.assertEqual(sum(amount for warehouse, amount in catalog.get_distribution(itemName)), catalog.get_total(itemName))
+            self.assertTrue(all(amount >= 0 for warehouse, amount in catalog.get_distribution(itemName)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+
+from InventoryAllocator import InventoryAllocator
+from InventoryAllocatorCli import load_catalog
+
+"""
+    asyncio server in front of the allocator.
+
+    Clients connect over TCP and send one order per line as JSON, the service answers every line with
+    one JSON line, {"shipment": [...]} or {"error": "..."}, in the order the lines were sent. A client that
+    wants several orders in flight opens several connections.
+
+    Requests are not allocated one by one. The first request to arrive opens a window of `window` seconds,
+    and every request that arrives in that window (up to maxBatchSize of them) is allocated in one
+    allocate_many pass over the catalog, which shares the work of every item ordered more than once.
+
+    Requests wait in a queue of at most maxQueueSize orders. When it is full, connections stop being read
+    until the allocator catches up, so clients are slowed down by TCP itself rather than the service
+    holding an unbounded backlog in memory.
+
+    python AllocationService.py --warehouses warehouses.json --port 8765
+    python LoadGenerator.py --port 8765
+"""
+
+def is_order(order):
+    return isinstance(order, dict) and all(isinstance(itemAmount, int) for itemAmount in order.values())
+
+class AllocationService:
+    def __init__(self, inventoryAllocator, window=0.002, maxBatchSize=1000, maxQueueSize=10000):
+        self.inventoryAllocator = inventoryAllocator
+        self.window = window
+        self.maxBatchSize = maxBatchSize
+        self.maxQueueSize = maxQueueSize
+
+        # created by start, inside the event loop that runs the service
+        self.queue = None
+        self.server = None
+        self.batcher = None
+
+        # batchSizes[size] = number of allocate_many passes over that many orders
+        self.batchSizes = {}
+
+    async def start(self, host='127.0.0.1', port=0):
+        # port 0 picks a free port, see self.port
+        self.queue = asyncio.Queue(self.maxQueueSize)
+        self.batcher = asyncio.ensure_future(self._run_batches())
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+
+    async def allocate(self, order):
+        # waits while the queue is full, then until the batch holding the order has been allocated
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((order, future))
+        return await future
+
+    def _allocate_batch(self, batch):
+        orders = [ order for order, future in batch ]
+        self.batchSizes[len(orders)] = self.batchSizes.get(len(orders), 0) + 1
+
+        try:
+            shipments = self.inventoryAllocator.allocate_many(orders)
+        except Exception as error:
+            for order, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (order, future), shipment in zip(batch, shipments):
+            # the client may have disconnected while it waited
+            if not future.done():
+                future.set_result(shipment)
+
+    async def _run_batches(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.window > 0:
+                await asyncio.sleep(self.window)
+
+            while len(batch) < self.maxBatchSize and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            self._allocate_batch(batch)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                try:
+                    order = json.loads(line)
+                except ValueError:
+                    order = None
+
+                if is_order(order):
+                    try:
+                        response = { 'shipment': await self.allocate(order) }
+                    except Exception as error:
+                        response = { 'error': str(error) }
+                else:
+                    response = { 'error': 'not an order' }
+
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Serve allocation requests over TCP, one JSON order per line.')
+    catalogSource = parser.add_mutually_exclusive_group(required=True)
+    catalogSource.add_argument('--warehouses', help='JSON file holding the warehouse distribution list')
+    catalogSource.add_argument('--snapshot', help='catalog snapshot to memory-map instead of reading the warehouses')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--window', type=float, default=0.002, help='seconds requests are gathered for before a batch is allocated')
+    parser.add_argument('--max-batch-size', type=int, default=1000, help='most orders allocated in one batch')
+    parser.add_argument('--max-queue-size', type=int, default=10000, help='most orders waiting before connections stop being read')
+    return parser.parse_args(argv)
+
+async def serve(args):
+    inventoryAllocator = InventoryAllocator.from_catalog(load_catalog(args.warehouses, args.snapshot))
+    service = await AllocationService(inventoryAllocator, args.window, args.max_batch_size, args.max_queue_size).start(args.host, args.port)
+    print('serving on %s:%d' % (args.host, service.port), flush=True)
+    await service.server.serve_forever()
+
+def main(argv=None):
+    try:
+        asyncio.run(serve(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
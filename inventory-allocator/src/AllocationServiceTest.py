@@ -0,0 +1,70 @@
+import asyncio
+import json
+import unittest
+from AllocationService import AllocationService
+from Catalog import Catalog
+from InventoryAllocator import InventoryAllocator
+
+class AllocationServiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.inventoryAllocator = InventoryAllocator.from_catalog(Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 10 } },
+            { 'name': 'dm', 'inventory': { 'banana': 5, 'orange': 10 } }]))
+
+    def run_service(self, test, **options):
+        async def run():
+            service = await AllocationService(self.inventoryAllocator, **options).start()
+            try:
+                return await test(service)
+            finally:
+                await service.close()
+        return asyncio.run(run())
+
+    async def request(self, port, lines):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        responses = []
+        for line in lines:
+            writer.write(line.encode('utf-8') + b'\n')
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        return responses
+
+    # every line gets the shipment the allocator gives, or an error for lines that are not orders
+    def test_requests_over_tcp(self):
+        async def test(service):
+            return await self.request(service.port, ['{ "apple": 5, "orange": 15 }', '{ "banana": 6 }', 'not json', '[1, 2]'])
+
+        self.assertEqual(self.run_service(test), [
+            { 'shipment': [{ 'owd': { 'apple': 5, 'orange': 10 } }, { 'dm': { 'orange': 5 } }] },
+            { 'shipment': [] },
+            { 'error': 'not an order' },
+            { 'error': 'not an order' },
+        ])
+
+    # requests arriving within the window are allocated in one batch, no more than maxBatchSize at a time
+    def test_requests_are_coalesced(self):
+        async def test(service):
+            orders = [ { 'orange': amount } for amount in range(1, 11) ]
+            shipments = await asyncio.gather(*[ service.allocate(order) for order in orders ])
+            return shipments, service.batchSizes
+
+        shipments, batchSizes = self.run_service(test, window=0.05, maxBatchSize=4)
+
+        self.assertEqual(shipments, [ self.inventoryAllocator.allocate_inventory({ 'orange': amount }) for amount in range(1, 11) ])
+        self.assertEqual(batchSizes, { 4: 2, 2: 1 })
+
+    # with the queue full, further requests wait for room instead of being queued
+    def test_queue_is_bounded(self):
+        async def test(service):
+            requests = [ asyncio.ensure_future(service.allocate({ 'apple': 1 })) for _ in range(5) ]
+            await asyncio.sleep(0.01)
+            queued = service.queue.qsize()
+            await asyncio.gather(*requests)
+            return queued
+
+        self.assertEqual(self.run_service(test, window=0.1, maxQueueSize=2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import bisect
+import contextlib
+import time
+
+"""
+    AllocationStats records where the allocator spends its time, for an allocator given one
+    (InventoryAllocator(..., stats=AllocationStats())). Without it the allocator only pays for a few
+    `is None` checks.
+
+    Phases, each a histogram of seconds per call:
+        catalogBuild    building the Catalog, when the allocator builds it itself
+        allocate        allocate_inventory, one observation per order
+        batch           allocate_many, one observation per batch
+        scan            looking for a single warehouse that can ship a line (Catalog.find_warehouse)
+        split           walking the distribution of an item with the selectors, for lines no single warehouse can ship
+
+    time_phase('catalogBuild') times a catalog built outside the allocator.
+
+    Counters:
+        lines               order lines allocated, allocate_many counts every distinct amount of an item once
+        selectorInserts     warehouses inserted into a selector
+        selectorEjections   warehouses ejected from a selector (del_min)
+        earlyExits          orders that returned [] because an item is unknown or short of stock
+
+    warehousesScanned is a histogram of how many warehouses of the distribution, in cost order, every line
+    went through before it was allocated (with a CapacityIndex the scan reaches that warehouse in O(log n)).
+
+    as_dict returns everything as plain values and to_prometheus as Prometheus text exposition.
+"""
+
+# upper bounds of the histogram buckets, the last bucket (+Inf) takes the rest
+SECONDS_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 0.1, 1.0)
+WAREHOUSE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def get_buckets(self):
+        # (upper bound, number of observations no larger than it), cumulative as in Prometheus
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return buckets
+
+    def as_dict(self):
+        return { 'count': self.count, 'sum': self.sum, 'buckets': { str(bound): count for bound, count in self.get_buckets() } }
+
+class AllocationStats:
+    PHASES = ('catalogBuild', 'allocate', 'batch', 'scan', 'split')
+    COUNTERS = ('lines', 'selectorInserts', 'selectorEjections', 'earlyExits')
+
+    def __init__(self):
+        self.phases = { phase: Histogram(SECONDS_BUCKETS) for phase in self.PHASES }
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.warehousesScanned = Histogram(WAREHOUSE_BUCKETS)
+
+    def observe(self, phase, seconds):
+        self.phases[phase].observe(seconds)
+
+    @contextlib.contextmanager
+    def time_phase(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase].observe(time.perf_counter() - start)
+
+    def count(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    def observe_line(self, warehousesScanned):
+        self.counters['lines'] += 1
+        self.warehousesScanned.observe(warehousesScanned)
+
+    def as_dict(self):
+        return {
+            'phases': { phase: histogram.as_dict() for phase, histogram in self.phases.items() },
+            'counters': dict(self.counters),
+            'warehousesScanned': self.warehousesScanned.as_dict(),
+        }
+
+    def to_prometheus(self, prefix='inventory_allocator'):
+        lines = ['# TYPE %s_phase_seconds histogram' % prefix]
+        for phase, histogram in self.phases.items():
+            for bound, count in histogram.get_buckets():
+                lines.append('%s_phase_seconds_bucket{phase="%s",le="%s"} %d' % (prefix, phase, _format_bound(bound), count))
+            lines.append('%s_phase_seconds_sum{phase="%s"} %r' % (prefix, phase, float(histogram.sum)))
+            lines.append('%s_phase_seconds_count{phase="%s"} %d' % (prefix, phase, histogram.count))
+
+        lines.append('# TYPE %s_warehouses_scanned histogram' % prefix)
+        for bound, count in self.warehousesScanned.get_buckets():
+            lines.append('%s_warehouses_scanned_bucket{le="%s"} %d' % (prefix, _format_bound(bound), count))
+        lines.append('%s_warehouses_scanned_sum %d' % (prefix, self.warehousesScanned.sum))
+        lines.append('%s_warehouses_scanned_count %d' % (prefix, self.warehousesScanned.count))
+
+        for counter, value in self.counters.items():
+            name = '%s_%s_total' % (prefix, _snake_case(counter))
+            lines.append('# TYPE %s counter' % name)
+            lines.append('%s %d' % (name, value))
+        return '\n'.join(lines) + '\n'
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+def _snake_case(name):
+    return ''.join('_' + character.lower() if character.isupper() else character for character in name)
@@ -0,0 +1,60 @@
+import unittest
+from AllocationStats import AllocationStats
+from InventoryAllocator import InventoryAllocator
+
+class AllocationStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = AllocationStats()
+        self.inventoryAllocator = InventoryAllocator(warehouseDistributionList=[{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 1 } },
+            { 'name': 'dm', 'inventory': { 'apple': 5, 'orange': 1 } }, { 'name': 'ow', 'inventory': { 'orange': 3 } }], stats=self.stats)
+
+    # phases, selector churn, warehouses scanned and early exits are recorded for every order
+    def test_allocate_inventory(self):
+        self.inventoryAllocator.allocate_inventory({ 'apple': 3 })
+        self.inventoryAllocator.allocate_inventory({ 'apple': 10, 'orange': 2 })
+        self.inventoryAllocator.allocate_inventory({ 'apple': 11 })
+        self.inventoryAllocator.allocate_inventory({ 'kiwi': 1 })
+
+        stats = self.stats.as_dict()
+        self.assertEqual(stats['counters'], { 'lines': 3, 'selectorInserts': 2, 'selectorEjections': 0, 'earlyExits': 2 })
+        self.assertEqual(stats['phases']['catalogBuild']['count'], 1)
+        self.assertEqual(stats['phases']['allocate']['count'], 4)
+        self.assertEqual(stats['phases']['scan']['count'], 3)
+        self.assertEqual(stats['phases']['split']['count'], 1)
+        self.assertEqual(stats['warehousesScanned']['count'], 3)
+        self.assertEqual(stats['warehousesScanned']['sum'], 1 + 2 + 3)
+        self.assertEqual(stats['warehousesScanned']['buckets']['1'], 1)
+
+    # ejections are the warehouses that went into a selector but are not in the split
+    def test_ejections(self):
+        self.inventoryAllocator.allocate_inventory({ 'orange': 4 })
+
+        self.assertEqual(self.inventoryAllocator.allocate_inventory({ 'orange': 4 }), [{ 'owd': { 'orange': 1 } }, { 'ow': { 'orange': 3 } }])
+        self.assertEqual(self.stats.counters['selectorInserts'], 6)
+        self.assertEqual(self.stats.counters['selectorEjections'], 2)
+
+    # allocate_many is timed per batch and counts the orders it cannot fill as early exits
+    def test_allocate_many(self):
+        self.inventoryAllocator.allocate_many([{ 'apple': 3 }, { 'apple': 3 }, { 'kiwi': 1 }])
+
+        self.assertEqual(self.stats.phases['batch'].count, 1)
+        self.assertEqual(self.stats.counters['lines'], 1)
+        self.assertEqual(self.stats.counters['earlyExits'], 1)
+
+    # the Prometheus dump holds cumulative buckets and a total for every counter
+    def test_to_prometheus(self):
+        self.inventoryAllocator.allocate_inventory({ 'apple': 3 })
+
+        text = self.stats.to_prometheus()
+
+        self.assertIn('# TYPE inventory_allocator_phase_seconds histogram\n', text)
+        self.assertIn('inventory_allocator_phase_seconds_count{phase="allocate"} 1\n', text)
+        self.assertIn('inventory_allocator_phase_seconds_bucket{phase="allocate",le="+Inf"} 1\n', text)
+        self.assertIn('inventory_allocator_warehouses_scanned_bucket{le="1"} 1\n', text)
+        self.assertIn('inventory_allocator_selector_inserts_total 0\n', text)
+        self.assertIn('inventory_allocator_early_exits_total 0\n', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
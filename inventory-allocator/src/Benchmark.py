@@ -0,0 +1,422 @@
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from AllocationCache import AllocationCache
+from Catalog import Catalog
+from CatalogSnapshot import load_snapshot, write_snapshot
+from CompactCatalog import CompactCatalog
+from Heap import Heap
+from InventoryAllocator import InventoryAllocator
+from InventoryDeltaFeed import apply_deltas
+from ParallelAllocator import measure_scaling
+from WarehouseSelector import WarehouseSelector
+from WorkloadGenerator import WorkloadGenerator
+
+"""
+    Benchmarks for the allocator, run with `python Benchmark.py <benchmark>`.
+
+    Inputs are generated from a fixed seed so that numbers can be compared between runs, see WorkloadGenerator.
+    `python Benchmark.py suite --json results.json` runs the main paths over a grid of workloads and writes
+    the results as JSON, so that the results of two versions can be compared.
+"""
+
+def generate_warehouses(warehouseCount, itemCount, itemsPerWarehouse, seed=0):
+    return WorkloadGenerator(warehouseCount, itemCount, itemsPerWarehouse, seed=seed).generate_warehouses()
+
+def generate_orders(orderCount, itemCount, linesPerOrder, seed=0):
+    return WorkloadGenerator(0, itemCount, 0, linesPerOrder, seed=seed).generate_orders(orderCount)
+
+def benchmark_catalog_reuse(warehouseCounts=(10, 100, 300, 1000), itemCount=500, itemsPerWarehouse=50, orderCount=200, linesPerOrder=5):
+    # compares building the catalog for every order with building it once and reusing it,
+    # the per order cost of the reused catalog should stay flat as the warehouse count grows
+    results = []
+    orders = generate_orders(orderCount, itemCount, linesPerOrder)
+
+    for warehouseCount in warehouseCounts:
+        warehouseDistributionList = generate_warehouses(warehouseCount, itemCount, itemsPerWarehouse)
+
+        start = time.perf_counter()
+        for order in orders:
+            InventoryAllocator(order, warehouseDistributionList).allocate_inventory()
+        rebuildSeconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+        buildSeconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for order in orders:
+            inventoryAllocator.allocate_inventory(order)
+        reuseSeconds = time.perf_counter() - start
+
+        results.append({
+            'warehouses': warehouseCount,
+            'catalogBuildMs': buildSeconds * 1e3,
+            'rebuildPerOrderUs': rebuildSeconds / orderCount * 1e6,
+            'reusePerOrderUs': reuseSeconds / orderCount * 1e6,
+        })
+    return results
+
+def benchmark_batch(warehouseCount=300, itemCount=500, itemsPerWarehouse=50, orderCounts=(100, 1000, 10000), linesPerOrder=5):
+    # compares allocate_inventory called for every order with a single allocate_many call
+    results = []
+    inventoryAllocator = InventoryAllocator.from_catalog(Catalog(generate_warehouses(warehouseCount, itemCount, itemsPerWarehouse)))
+
+    for orderCount in orderCounts:
+        orders = generate_orders(orderCount, itemCount, linesPerOrder)
+
+        start = time.perf_counter()
+        for order in orders:
+            inventoryAllocator.allocate_inventory(order)
+        singleSeconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        inventoryAllocator.allocate_many(orders)
+        batchSeconds = time.perf_counter() - start
+
+        results.append({
+            'orders': orderCount,
+            'singleOrdersPerSec': orderCount / singleSeconds,
+            'batchOrdersPerSec': orderCount / batchSeconds,
+        })
+    return results
+
+def benchmark_scaling(warehouseCount=300, itemCount=500, itemsPerWarehouse=50, orderCount=20000, linesPerOrder=5):
+    # scaling curve of ParallelAllocator from 1 process up to one process per core
+    catalog = Catalog(generate_warehouses(warehouseCount, itemCount, itemsPerWarehouse))
+    orders = generate_orders(orderCount, itemCount, linesPerOrder)
+    return measure_scaling(catalog, orders, range(1, (os.cpu_count() or 1) + 1))
+
+def _split_with_heap(distribution, itemAmount):
+    # the order line path of the allocator as it was with Heap, a new Heap for every line
+    distributionHeap = Heap()
+    for warehouse, amountInWarehouse in distribution:
+        distributionHeap.insert((warehouse, amountInWarehouse))
+        if distributionHeap.total - distributionHeap.get_min_child()[1] >= itemAmount:
+            distributionHeap.del_min()
+    return distributionHeap.get_split(itemAmount)
+
+def _split_with_selector(selector, distribution, itemAmount):
+    selector.reset(distribution)
+    for index, (warehouse, amountInWarehouse) in enumerate(distribution):
+        selector.insert(index, amountInWarehouse)
+        if selector.total - selector.get_min_amount() >= itemAmount:
+            selector.del_min()
+    return selector.get_split(itemAmount)
+
+def _count_allocations(function, *args):
+    # Number of memory blocks function(*args) takes from the allocator and still holds at its next line,
+    # the sum of the increases of sys.getallocatedblocks() between the lines of function itself. Objects
+    # a callee creates and keeps (a heap node) are counted, the frames of the callees are freed before the
+    # next line and are not, neither are objects reused from CPython's free lists (small tuples)
+    code = function.__code__
+    state = { 'blocks': None, 'allocations': 0 }
+
+    def trace_lines(frame, event, arg):
+        blocks = sys.getallocatedblocks()
+        if state['blocks'] is not None and blocks > state['blocks']:
+            state['allocations'] += blocks - state['blocks']
+        state['blocks'] = blocks
+        return trace_lines
+
+    def trace_calls(frame, event, arg):
+        return trace_lines if frame.f_code is code else None
+
+    sys.settrace(trace_calls)
+    try:
+        function(*args)
+    finally:
+        sys.settrace(None)
+    return state['allocations']
+
+def benchmark_selector(warehouseCounts=(10, 100, 1000), lines=2000, countedLines=10):
+    # time, allocations and peak memory per order line for Heap and WarehouseSelector, every line has
+    # to be split across warehouses so every warehouse goes through the heap. Allocations are averaged
+    # over countedLines lines, as counting them traces every line
+    results = []
+    rng = random.Random(0)
+    selector = WarehouseSelector()
+
+    for warehouseCount in warehouseCounts:
+        distribution = [ ('w%d' % i, rng.randint(1, 20)) for i in range(warehouseCount) ]
+        itemAmount = sum(amount for _, amount in distribution) // 2
+        repeats = max(1, lines // warehouseCount)
+
+        row = { 'warehouses': warehouseCount }
+        for name, split, args in (('heap', _split_with_heap, (distribution, itemAmount)),
+                                  ('selector', _split_with_selector, (selector, distribution, itemAmount))):
+            split(*args)
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                split(*args)
+            row[name + 'PerLineUs'] = (time.perf_counter() - start) / repeats * 1e6
+
+            row[name + 'AllocationsPerLine'] = sum(_count_allocations(split, *args) for _ in range(countedLines)) / countedLines
+
+            tracemalloc.start()
+            split(*args)
+            row[name + 'PeakBytes'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        if _split_with_heap(distribution, itemAmount) != _split_with_selector(selector, distribution, itemAmount):
+            raise AssertionError('Heap and WarehouseSelector disagree for %d warehouses' % warehouseCount)
+        results.append(row)
+    return results
+
+def benchmark_capacity_index(warehouseCounts=(10, 100, 1000, 10000), lookups=2000):
+    # time to find the cheapest warehouse that can ship a line on its own with and without a
+    # CapacityIndex, the amounts are drawn so the answer is often far down the distribution or missing
+    results = []
+    rng = random.Random(0)
+
+    for warehouseCount in warehouseCounts:
+        warehouseDistributionList = [ { 'name': 'w%d' % i, 'inventory': { 'apple': rng.randint(0, 100) } } for i in range(warehouseCount) ]
+        amounts = [ rng.randint(90, 110) for _ in range(lookups) ]
+
+        row = { 'warehouses': warehouseCount }
+        for name, threshold in (('scan', warehouseCount + 1), ('index', 0)):
+            catalog = Catalog(warehouseDistributionList)
+            catalog.CAPACITY_INDEX_THRESHOLD = threshold
+            catalog.find_warehouse('apple', 1)
+
+            start = time.perf_counter()
+            for amount in amounts:
+                catalog.find_warehouse('apple', amount)
+            row[name + 'PerLookupUs'] = (time.perf_counter() - start) / lookups * 1e6
+        results.append(row)
+    return results
+
+def benchmark_memory(warehouseCount=300, itemCounts=(1000, 10000, 50000), stockedFraction=0.1):
+    # memory held by a Catalog and a CompactCatalog of the same warehouses, measured with tracemalloc
+    results = []
+
+    for itemCount in itemCounts:
+        warehouseDistributionList = generate_warehouses(warehouseCount, itemCount, int(itemCount * stockedFraction))
+        pairs = sum(len(inventoryDistribution['inventory']) for inventoryDistribution in warehouseDistributionList)
+
+        row = { 'items': itemCount, 'stockedPairs': pairs }
+        for name, catalogClass in (('catalog', Catalog), ('compact', CompactCatalog)):
+            tracemalloc.start()
+            catalog = catalogClass(warehouseDistributionList)
+            row[name + 'MB'] = tracemalloc.get_traced_memory()[0] / 1e6
+            tracemalloc.stop()
+            del catalog
+
+        row['compactBytesPerPair'] = row['compactMB'] * 1e6 / pairs
+        row['catalogBytesPerPair'] = row['catalogMB'] * 1e6 / pairs
+        results.append(row)
+    return results
+
+def benchmark_cold_start(warehouseCount=100, itemCounts=(10000, 100000, 300000), stockedFraction=0.05):
+    # time from nothing in memory to the first allocated order: parsing the warehouse JSON and building a
+    # Catalog, against mapping a snapshot of the same catalog
+    results = []
+
+    for itemCount in itemCounts:
+        warehouseDistributionList = generate_warehouses(warehouseCount, itemCount, int(itemCount * stockedFraction))
+        warehousesJson = json.dumps(warehouseDistributionList)
+        order = generate_orders(1, itemCount, 5)[0]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'inventory.snap')
+            write_snapshot(Catalog(warehouseDistributionList), path)
+
+            start = time.perf_counter()
+            InventoryAllocator.from_catalog(Catalog(json.loads(warehousesJson))).allocate_inventory(order)
+            jsonSeconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            InventoryAllocator.from_catalog(load_snapshot(path)).allocate_inventory(order)
+            snapshotSeconds = time.perf_counter() - start
+
+            results.append({
+                'items': itemCount,
+                'snapshotMB': os.path.getsize(path) / 1e6,
+                'jsonStartMs': jsonSeconds * 1e3,
+                'snapshotStartMs': snapshotSeconds * 1e3,
+            })
+    return results
+
+def benchmark_deltas(warehouseCount=300, itemCounts=(1000, 10000, 50000), itemsPerWarehouse=100, deltaCount=50000):
+    # feed lines applied per second to a catalog that is already built, against building the catalog again;
+    # every item is stocked by enough warehouses to have a CapacityIndex that the deltas keep up to date
+    results = []
+    rng = random.Random(0)
+
+    for itemCount in itemCounts:
+        warehouseDistributionList = generate_warehouses(warehouseCount, itemCount, min(itemCount, itemsPerWarehouse * itemCount // 1000))
+        catalog = Catalog(warehouseDistributionList)
+        for itemName in catalog.catalog:
+            catalog.find_warehouse(itemName, 1)
+
+        pairs = [ (inventoryDistribution['name'], itemName) for inventoryDistribution in warehouseDistributionList
+            for itemName in inventoryDistribution['inventory'] ]
+        lines = []
+        for _ in range(deltaCount):
+            warehouse, itemName = rng.choice(pairs)
+            lines.append('%s %s %s%d' % (warehouse, itemName, rng.choice('+='), rng.randint(0, 20)))
+
+        start = time.perf_counter()
+        apply_deltas(catalog, lines)
+        deltaSeconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        Catalog(warehouseDistributionList)
+        rebuildSeconds = time.perf_counter() - start
+
+        results.append({
+            'items': itemCount,
+            'stockedPairs': len(pairs),
+            'deltasPerSec': deltaCount / deltaSeconds,
+            'rebuildMs': rebuildSeconds * 1e3,
+        })
+    return results
+
+def benchmark_cache(warehouseCount=300, itemCount=500, itemsPerWarehouse=50, orderCount=50000, deltaEvery=(0, 100, 10)):
+    # single item orders where a few popular items and small amounts make up most of the traffic, with one
+    # stock change every deltaEvery orders, allocated with and without an AllocationCache
+    results = []
+    rng = random.Random(0)
+    warehouseDistributionList = generate_warehouses(warehouseCount, itemCount, itemsPerWarehouse)
+    orders = [ { 'item%d' % min(int(rng.paretovariate(1.2)) - 1, itemCount - 1): min(int(rng.paretovariate(1.5)), 30) } for _ in range(orderCount) ]
+
+    for every in deltaEvery:
+        row = { 'deltaEvery': every }
+        for name, cached in (('plain', False), ('cached', True)):
+            catalog = Catalog(warehouseDistributionList)
+            cache = AllocationCache(catalog) if cached else None
+            inventoryAllocator = InventoryAllocator.from_catalog(catalog, cache=cache)
+
+            start = time.perf_counter()
+            for i, order in enumerate(orders):
+                if every and i % every == 0:
+                    itemName = next(iter(order))
+                    catalog.adjust_amount(catalog.get_distribution(itemName)[0][0], itemName, 1)
+                inventoryAllocator.allocate_inventory(order)
+            row[name + 'OrdersPerSec'] = orderCount / (time.perf_counter() - start)
+
+        row['hitRate'] = cache.get_stats()['hitRate']
+        results.append(row)
+    return results
+
+def _time_per_call(calls, function):
+    # microseconds per call of function, which makes `calls` calls
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) / calls * 1e6 if calls else None
+
+def _time_split_path(catalog, orders):
+    # microseconds per order line that no single warehouse can ship, split and added to a shipment by
+    # Heap.update_shipment and by the WarehouseSelector path of the allocator
+    inventoryAllocator = InventoryAllocator.from_catalog(catalog)
+    selector = WarehouseSelector()
+    lines = [ (itemName, itemAmount) for order in orders for itemName, itemAmount in order.items()
+        if itemName in catalog and itemAmount <= catalog.get_total(itemName) and catalog.find_warehouse(itemName, itemAmount) < 0 ]
+
+    def split_with_heap():
+        shipment = {}
+        for itemName, itemAmount in lines:
+            distributionHeap = Heap()
+            for warehouse, amountInWarehouse in catalog.get_distribution(itemName):
+                distributionHeap.insert((warehouse, amountInWarehouse))
+                if distributionHeap.total - distributionHeap.get_min_child()[1] >= itemAmount:
+                    distributionHeap.del_min()
+            distributionHeap.update_shipment(shipment, itemName, itemAmount)
+
+    def split_with_selector():
+        shipment = {}
+        for itemName, itemAmount in lines:
+            inventoryAllocator._add_to_shipment(shipment, itemName, _split_with_selector(selector, catalog.get_distribution(itemName), itemAmount))
+
+    return len(lines), _time_per_call(len(lines), split_with_heap), _time_per_call(len(lines), split_with_selector)
+
+def benchmark_suite(warehouseCounts=(10, 100, 1000), itemCounts=(1000, 10000), skews=(0.0, 1.2), linesPerOrders=(1, 5),
+        itemsPerWarehouse=100, orderCount=2000):
+    # catalog build, allocate_inventory one order at a time, allocate_many over all orders and the split
+    # path of lines that have to be split across warehouses, for every combination of the workload parameters
+    results = []
+
+    for warehouseCount, itemCount, skew, linesPerOrder in itertools.product(warehouseCounts, itemCounts, skews, linesPerOrders):
+        workload = WorkloadGenerator(warehouseCount, itemCount, itemsPerWarehouse, linesPerOrder, skew)
+        warehouseDistributionList = workload.generate_warehouses()
+        orders = workload.generate_orders(orderCount)
+
+        start = time.perf_counter()
+        catalog = Catalog(warehouseDistributionList)
+        buildMs = (time.perf_counter() - start) * 1e3
+
+        inventoryAllocator = InventoryAllocator.from_catalog(catalog)
+        splitLines, heapSplitUs, selectorSplitUs = _time_split_path(catalog, orders)
+
+        results.append({
+            'warehouses': warehouseCount,
+            'items': itemCount,
+            'skew': skew,
+            'lines': linesPerOrder,
+            'buildMs': buildMs,
+            'singleUsPerOrder': _time_per_call(orderCount, lambda: [ inventoryAllocator.allocate_inventory(order) for order in orders ]),
+            'batchUsPerOrder': _time_per_call(orderCount, lambda: inventoryAllocator.allocate_many(orders)),
+            'splitLines': splitLines,
+            'heapSplitUsPerLine': heapSplitUs,
+            'selectorSplitUsPerLine': selectorSplitUs,
+        })
+    return results
+
+BENCHMARKS = {
+    'batch': benchmark_batch,
+    'cache': benchmark_cache,
+    'capacity-index': benchmark_capacity_index,
+    'catalog-reuse': benchmark_catalog_reuse,
+    'cold-start': benchmark_cold_start,
+    'deltas': benchmark_deltas,
+    'memory': benchmark_memory,
+    'scaling': benchmark_scaling,
+    'selector': benchmark_selector,
+    'suite': benchmark_suite,
+}
+
+def print_results(results):
+    columns = list(results[0].keys())
+    print('  '.join('%16s' % column for column in columns))
+    for row in results:
+        print('  '.join('%16.2f' % row[column] if isinstance(row[column], float) else '%16s' % row[column] for column in columns))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run allocator benchmarks.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--json', help='also write the results to this file as JSON, - writes them to stdout instead of the table')
+    args = parser.parse_args(argv)
+
+    results = BENCHMARKS[args.benchmark]()
+    if args.json is None:
+        print_results(results)
+        return
+
+    report = {
+        'benchmark': args.benchmark,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_results(results)
+        with open(args.json, 'w') as jsonFile:
+            json.dump(report, jsonFile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+    CapacityIndex answers "which is the cheapest warehouse holding at least k units of an item" in O(log n).
+
+    It is a max segment tree over the amounts of an item's distribution, in cost order. tree[1] is the
+    largest amount of all warehouses and the children of node i are i * 2 and i * 2 + 1, with the amounts
+    themselves in the leaves starting at tree[size]. Finding the cheapest warehouse walks down from the root,
+    always going left when the left subtree holds a large enough amount. Changing an amount updates the
+    leaf and its ancestors, also O(log n).
+
+    get_index is shared by Catalog and CompactCatalog to decide which items are worth an index: items held
+    by fewer than THRESHOLD warehouses are simply scanned, the others get a CapacityIndex the first time
+    they are looked up.
+"""
+class CapacityIndex:
+    # items held by fewer warehouses than this are simply scanned
+    THRESHOLD = 32
+
+    def __init__(self, amounts):
+        self.size = 1
+        while self.size < len(amounts):
+            self.size *= 2
+
+        self.tree = [0] * (2 * self.size)
+        self.tree[self.size:self.size + len(amounts)] = amounts
+        for i in range(self.size - 1, 0, -1):
+            self.tree[i] = max(self.tree[i * 2], self.tree[i * 2 + 1])
+
+    @classmethod
+    def get_index(cls, capacityIndexes, key, count, get_amounts, threshold=THRESHOLD):
+        # CapacityIndex over the count amounts of an item, kept in capacityIndexes[key], or None when count
+        # is below threshold and the amounts should be scanned instead. get_amounts(key) returns the amounts in
+        # cost order, it is only called to build the index
+        if count < threshold:
+            return None
+
+        capacityIndex = capacityIndexes.get(key)
+        if capacityIndex is None:
+            capacityIndex = cls(get_amounts(key))
+            capacityIndexes[key] = capacityIndex
+        return capacityIndex
+
+    def get_max(self):
+        return self.tree[1]
+
+    def update(self, position, amount):
+        tree = self.tree
+        i = position + self.size
+        tree[i] = amount
+
+        i = i // 2
+        while i > 0:
+            tree[i] = max(tree[i * 2], tree[i * 2 + 1])
+            i = i // 2
+
+    def find_first(self, amount):
+        # position of the first (cheapest) warehouse holding at least amount, -1 if there is none
+        tree = self.tree
+        if tree[1] < amount:
+            return -1
+
+        i = 1
+        while i < self.size:
+            i = i * 2
+            if tree[i] < amount:
+                i += 1
+        return i - self.size
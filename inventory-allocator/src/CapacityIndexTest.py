@@ -0,0 +1,48 @@
+import random
+import unittest
+from CapacityIndex import CapacityIndex
+
+class CapacityIndexTest(unittest.TestCase):
+
+    # the first (cheapest) warehouse with enough is found, or -1 when no single warehouse has enough
+    def test_find_first(self):
+        capacityIndex = CapacityIndex([3, 0, 7, 2, 7, 9])
+
+        self.assertEqual(capacityIndex.find_first(1), 0)
+        self.assertEqual(capacityIndex.find_first(4), 2)
+        self.assertEqual(capacityIndex.find_first(8), 5)
+        self.assertEqual(capacityIndex.find_first(10), -1)
+        self.assertEqual(CapacityIndex([]).find_first(1), -1)
+
+    # updates are seen by the next lookup, checked against a linear scan
+    def test_update(self):
+        rng = random.Random(0)
+        amounts = [ rng.randint(0, 20) for _ in range(37) ]
+        capacityIndex = CapacityIndex(amounts)
+
+        for _ in range(1000):
+            position = rng.randrange(len(amounts))
+            amounts[position] = rng.randint(0, 20)
+            capacityIndex.update(position, amounts[position])
+
+            amount = rng.randint(1, 21)
+            expected = next((i for i, amountInWarehouse in enumerate(amounts) if amount <= amountInWarehouse), -1)
+            self.assertEqual(capacityIndex.find_first(amount), expected)
+            self.assertEqual(capacityIndex.get_max(), max(amounts))
+
+    # items held by fewer than threshold warehouses get no index, the others are indexed once
+    def test_get_index(self):
+        amounts = [3, 0, 7, 2, 7, 9]
+        capacityIndexes = {}
+
+        self.assertIsNone(CapacityIndex.get_index(capacityIndexes, 'apple', len(amounts), lambda key: amounts, threshold=10))
+        self.assertEqual(capacityIndexes, {})
+
+        capacityIndex = CapacityIndex.get_index(capacityIndexes, 'apple', len(amounts), lambda key: amounts, threshold=2)
+        self.assertEqual(capacityIndex.find_first(4), 2)
+        self.assertIs(capacityIndexes['apple'], capacityIndex)
+        self.assertIs(CapacityIndex.get_index(capacityIndexes, 'apple', len(amounts), None, threshold=2), capacityIndex)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+from CapacityIndex import CapacityIndex
+
+"""
+    The Catalog is built once from a warehouseDistributionList and can then be shared by
+    any number of allocations. Building it is O(warehouses x items), so it should not be
+    rebuilt for every order that is allocated against the same inventory snapshot.
+
+    Items stocked in many warehouses get a CapacityIndex, built the first time one of them is looked up,
+    so the cheapest warehouse that can ship an amount on its own is found in O(log warehouses).
+
+    Amounts change in place through adjust_amount, O(1) plus O(log warehouses) when the item has a
+    CapacityIndex. A warehouse can start stocking a new item, and warehouses can be added (as the most
+    expensive one) or retired, without rebuilding the catalog, see InventoryDeltaFeed.
+"""
+class Catalog:
+    # items held by fewer warehouses than this are simply scanned, see CapacityIndex.get_index
+    CAPACITY_INDEX_THRESHOLD = CapacityIndex.THRESHOLD
+
+    def __init__(self, warehouseDistributionList):
+        self.warehouseDistributionList = warehouseDistributionList
+
+        # catalog works as sort of a reverse index
+        # so we simply use the name of the item we are looking for to
+        # lookup warehouses that contain the item
+
+        # catalog format
+        # catalog['name of item'] = {'total': 'total number of all items ', 'distribution': ['warehouse': 'amount'],
+        #   'position': {'warehouse': 'index of the warehouse in distribution'}}
+        self.catalog = {}
+        self._create_catalog()
+
+        # warehouseRanks['name of warehouse'] = position of the warehouse in the cost order
+        self.warehouseRanks = { inventoryDistribution['name']: rank for rank, inventoryDistribution in enumerate(warehouseDistributionList) }
+        self.nextWarehouseRank = len(warehouseDistributionList)
+
+        # versions['name of item'] = number of times the stock of the item has changed, see AllocationCache
+        self.versions = {}
+
+        # capacityIndexes['name of item'] = CapacityIndex over the amounts of its distribution
+        self.capacityIndexes = {}
+
+    def _create_catalog(self):
+        for inventoryDistribution in self.warehouseDistributionList:
+            warehouse = inventoryDistribution['name']
+            inventory = inventoryDistribution['inventory']
+
+            for itemName, itemAmount in inventory.items():
+                # check if item is in catalog
+                if not (itemName in self.catalog):
+                    self.catalog[itemName] = { 'total': 0, 'distribution': [], 'position': {} }
+
+                self.catalog[itemName]['total'] += itemAmount
+                self.catalog[itemName]['position'][warehouse] = len(self.catalog[itemName]['distribution'])
+                self.catalog[itemName]['distribution'].append((warehouse, itemAmount))
+
+    def __contains__(self, itemName):
+        return itemName in self.catalog
+
+    def get_total(self, itemName):
+        return self.catalog[itemName]['total']
+
+    def get_distribution(self, itemName):
+        # warehouses holding the item as (warehouse, amount), cheapest first
+        return self.catalog[itemName]['distribution']
+
+    def get_version(self, itemName):
+        # changes whenever the stock of the item does, also for items that are not in the catalog yet
+        return self.versions.get(itemName, 0)
+
+    def get_warehouse_rank(self, warehouse):
+        # lower ranks are cheaper to ship from
+        return self.warehouseRanks[warehouse]
+
+    def get_amount(self, warehouse, itemName):
+        entry = self.catalog[itemName]
+        return entry['distribution'][entry['position'][warehouse]][1]
+
+    def _insert_entry(self, warehouse, itemName, amount):
+        # a warehouse starts stocking an item, its entry goes where its rank puts it in the cost order,
+        # which moves the entries after it, so this is O(warehouses holding the item)
+        rank = self.warehouseRanks[warehouse]
+        if not (itemName in self.catalog):
+            self.catalog[itemName] = { 'total': 0, 'distribution': [], 'position': {} }
+
+        entry = self.catalog[itemName]
+        distribution = entry['distribution']
+
+        low, high = 0, len(distribution)
+        while low < high:
+            middle = (low + high) // 2
+            if self.warehouseRanks[distribution[middle][0]] < rank:
+                low = middle + 1
+            else:
+                high = middle
+
+        distribution.insert(low, (warehouse, amount))
+        for index in range(low, len(distribution)):
+            entry['position'][distribution[index][0]] = index
+        entry['total'] += amount
+        self.versions[itemName] = self.versions.get(itemName, 0) + 1
+
+        # positions have moved, the index is built again the next time it is needed
+        self.capacityIndexes.pop(itemName, None)
+
+    def adjust_amount(self, warehouse, itemName, delta):
+        # the position lookup means an update only touches a single distribution entry and the total
+        entry = self.catalog.get(itemName)
+        index = entry['position'].get(warehouse) if entry is not None else None
+
+        if index is None:
+            if delta < 0:
+                raise ValueError('not enough %s at %s to remove %d' % (itemName, warehouse, -delta))
+            self._insert_entry(warehouse, itemName, delta)
+            return
+
+        amount = entry['distribution'][index][1] + delta
+
+        if amount < 0:
+            raise ValueError('not enough %s at %s to remove %d' % (itemName, warehouse, -delta))
+
+        entry['distribution'][index] = (warehouse, amount)
+        entry['total'] += delta
+        self.versions[itemName] = self.versions.get(itemName, 0) + 1
+
+        if itemName in self.capacityIndexes:
+            self.capacityIndexes[itemName].update(index, amount)
+
+    def _get_amounts(self, itemName):
+        # amounts of the distribution of itemName, to build its CapacityIndex from
+        return [ amount for warehouse, amount in self.catalog[itemName]['distribution'] ]
+
+    def find_warehouse(self, itemName, itemAmount):
+        # position in the distribution of the cheapest warehouse holding at least itemAmount (which
+        # must be positive), -1 if no single warehouse does
+        distribution = self.catalog[itemName]['distribution']
+        capacityIndex = CapacityIndex.get_index(self.capacityIndexes, itemName, len(distribution),
+            self._get_amounts, self.CAPACITY_INDEX_THRESHOLD)
+        if capacityIndex is not None:
+            return capacityIndex.find_first(itemAmount)
+
+        for index, (warehouse, amountInWarehouse) in enumerate(distribution):
+            if itemAmount <= amountInWarehouse:
+                return index
+        return -1
+
+    def add_warehouse(self, warehouse, inventory):
+        # the new warehouse is the most expensive one, so its entries go at the end of every distribution
+        if warehouse in self.warehouseRanks:
+            raise ValueError('warehouse %s is already in the catalog' % warehouse)
+
+        self.warehouseRanks[warehouse] = self.nextWarehouseRank
+        self.nextWarehouseRank += 1
+
+        for itemName, itemAmount in inventory.items():
+            self.adjust_amount(warehouse, itemName, itemAmount)
+
+    def retire_warehouse(self, warehouse):
+        # removes the warehouse from the distribution of every item, O(items + entries moved)
+        del self.warehouseRanks[warehouse]
+
+        for itemName, entry in self.catalog.items():
+            index = entry['position'].pop(warehouse, None)
+            if index is None:
+                continue
+
+            distribution = entry['distribution']
+            entry['total'] -= distribution.pop(index)[1]
+            self.versions[itemName] = self.versions.get(itemName, 0) + 1
+            for position in range(index, len(distribution)):
+                entry['position'][distribution[position][0]] = position
+            self.capacityIndexes.pop(itemName, None)
@@ -0,0 +1,157 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from CompactCatalog import CompactCatalog
+
+"""
+    Binary snapshot of a catalog that a new process can memory-map instead of building the catalog again.
+
+    write_snapshot stores the arrays of a CompactCatalog as they are in memory, and load_snapshot maps the
+    file and hands those regions to CompactCatalog.from_buffers without copying or parsing them, so loading
+    takes the same time however large the snapshot is. Every process that loads the same file shares its
+    pages through the page cache.
+
+    Item names are stored sorted by their UTF-8 bytes, so an item is found by bisection over the mapped
+    names rather than by building a dict of every item at startup. Names that have been looked up are
+    remembered in a dict, so the items that are actually ordered cost a dict lookup after the first time.
+
+    File layout, every section starts on a multiple of 8 bytes:
+        header          magic, byte order, counts and the offset of every section (HEADER)
+        offsets         int64 [itemCount + 1]
+        entryWarehouses int32 [entryCount]
+        amounts         int64 [entryCount]
+        totals          int64 [itemCount]
+        nameOffsets     int64 [itemCount + 1], where the name of the item of each sorted rank starts in names
+        sortedItemIds   int32 [itemCount], the item id of each sorted rank
+        names           the UTF-8 item names, sorted
+        warehouses      the warehouse names in cost order, as JSON
+"""
+
+MAGIC = b'INVSNAP1'
+
+# magic, byte order, item count, entry count, then the offset and length of every section
+HEADER = struct.Struct('<8s8sQQ' + 'QQ' * 8)
+SECTIONS = ('offsets', 'entryWarehouses', 'amounts', 'totals', 'nameOffsets', 'sortedItemIds', 'names', 'warehouses')
+
+class SnapshotItemIds:
+    # item name to item id lookup over the sorted names of a snapshot
+    def __init__(self, nameOffsets, names, sortedItemIds):
+        self.nameOffsets = nameOffsets
+        self.names = names
+        self.sortedItemIds = sortedItemIds
+
+        # resolved['name of item'] = item id, only for names found in the snapshot so that it never holds more
+        # entries than the snapshot has items, however many unknown names are looked up
+        self.resolved = {}
+
+    def __len__(self):
+        return len(self.sortedItemIds)
+
+    def _name(self, rank):
+        return bytes(self.names[self.nameOffsets[rank]:self.nameOffsets[rank + 1]])
+
+    def _find(self, itemName):
+        itemId = self.resolved.get(itemName)
+        if itemId is not None:
+            return itemId
+
+        key = itemName.encode('utf-8')
+        low, high = 0, len(self.sortedItemIds)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < len(self.sortedItemIds) and self._name(low) == key:
+            itemId = self.sortedItemIds[low]
+            self.resolved[itemName] = itemId
+            return itemId
+        return -1
+
+    def __contains__(self, itemName):
+        return self._find(itemName) >= 0
+
+    def __getitem__(self, itemName):
+        itemId = self._find(itemName)
+        if itemId < 0:
+            raise KeyError(itemName)
+        return itemId
+
+    def get(self, itemName, default=None):
+        itemId = self._find(itemName)
+        return default if itemId < 0 else itemId
+
+    def __iter__(self):
+        for rank in range(len(self.sortedItemIds)):
+            yield self._name(rank).decode('utf-8')
+
+def _align(offset):
+    return (offset + 7) // 8 * 8
+
+def write_snapshot(catalog, path):
+    # catalog is a Catalog or a CompactCatalog, the file is written next to path and then moved over it,
+    # so processes never map a half written snapshot
+    if not isinstance(catalog, CompactCatalog):
+        catalog = CompactCatalog.from_catalog(catalog)
+
+    itemNames = catalog.get_item_names()
+    encodedNames = sorted((itemName.encode('utf-8'), itemId) for itemId, itemName in enumerate(itemNames))
+
+    nameOffsets = array('q', [0])
+    for name, itemId in encodedNames:
+        nameOffsets.append(nameOffsets[-1] + len(name))
+
+    sections = {
+        'offsets': array('q', catalog.offsets).tobytes(),
+        'entryWarehouses': array('i', catalog.entryWarehouses).tobytes(),
+        'amounts': array('q', catalog.amounts).tobytes(),
+        'totals': array('q', catalog.totals).tobytes(),
+        'nameOffsets': nameOffsets.tobytes(),
+        'sortedItemIds': array('i', [ itemId for name, itemId in encodedNames ]).tobytes(),
+        'names': b''.join(name for name, itemId in encodedNames),
+        'warehouses': json.dumps(list(catalog.warehouseNames)).encode('utf-8'),
+    }
+
+    layout = []
+    offset = _align(HEADER.size)
+    for section in SECTIONS:
+        layout.extend((offset, len(sections[section])))
+        offset = _align(offset + len(sections[section]))
+
+    temporaryPath = path + '.tmp'
+    with open(temporaryPath, 'wb') as snapshotFile:
+        snapshotFile.write(HEADER.pack(MAGIC, sys.byteorder.encode('ascii'), len(itemNames), len(catalog.amounts), *layout))
+        for section, sectionOffset in zip(SECTIONS, layout[::2]):
+            snapshotFile.seek(sectionOffset)
+            snapshotFile.write(sections[section])
+    os.replace(temporaryPath, path)
+
+def load_snapshot(path, writable=False):
+    # Maps a snapshot written by write_snapshot. The catalog is read only unless writable is True, in which
+    # case adjust_amount changes a private copy of the pages it writes to and never the file itself
+    with open(path, 'rb') as snapshotFile:
+        mapped = mmap.mmap(snapshotFile.fileno(), 0, access=mmap.ACCESS_COPY if writable else mmap.ACCESS_READ)
+
+    header = HEADER.unpack_from(mapped)
+    magic, byteOrder, itemCount, entryCount = header[:4]
+    if magic != MAGIC:
+        raise ValueError('%s is not an inventory snapshot' % path)
+    if byteOrder.rstrip(b'\0').decode('ascii') != sys.byteorder:
+        raise ValueError('%s was written on a machine with a different byte order' % path)
+
+    view = memoryview(mapped)
+    regions = {}
+    for section, (sectionOffset, length) in zip(SECTIONS, zip(header[4::2], header[5::2])):
+        regions[section] = view[sectionOffset:sectionOffset + length]
+
+    itemIds = SnapshotItemIds(regions['nameOffsets'].cast('q'), regions['names'], regions['sortedItemIds'].cast('i'))
+    warehouseNames = json.loads(bytes(regions['warehouses']).decode('utf-8'))
+
+    return CompactCatalog.from_buffers(warehouseNames, itemIds, regions['offsets'].cast('q'),
+        regions['entryWarehouses'].cast('i'), regions['amounts'].cast('q'), regions['totals'].cast('q'))
@@ -0,0 +1,88 @@
+import os
+import random
+import tempfile
+import unittest
+from Catalog import Catalog
+from CatalogSnapshot import load_snapshot, write_snapshot
+from InventoryAllocator import InventoryAllocator
+from ParallelAllocator import ParallelAllocator
+
+class CatalogSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.warehouseDistributionList = [ { 'name': 'w%d' % i, 'inventory': { 'itém%d' % j: rng.randint(0, 9) for j in range(40) if rng.random() < 0.4 } }
+            for i in range(50) ]
+        self.warehouseDistributionList[0]['inventory']['itém1'] = 3
+        self.orders = [ { 'itém%d' % j: rng.randint(0, 40) for j in range(42) if rng.random() < 0.1 } for _ in range(200) ]
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'inventory.snap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # a mapped snapshot gives the same shipments as the catalog it was written from
+    def test_same_shipments_as_catalog(self):
+        catalog = Catalog(self.warehouseDistributionList)
+        write_snapshot(catalog, self.path)
+
+        snapshotAllocator = InventoryAllocator.from_catalog(load_snapshot(self.path))
+        inventoryAllocator = InventoryAllocator.from_catalog(catalog)
+
+        self.assertFalse('kiwi' in snapshotAllocator.catalog)
+        self.assertEqual(snapshotAllocator.allocate_many(self.orders), inventoryAllocator.allocate_many(self.orders))
+
+    # the snapshot holds the amounts at the time it was written, and a read only snapshot cannot be changed
+    def test_snapshot_of_adjusted_amounts(self):
+        catalog = Catalog(self.warehouseDistributionList)
+        catalog.adjust_amount('w0', 'itém1', 5)
+        write_snapshot(catalog, self.path)
+
+        snapshot = load_snapshot(self.path)
+
+        self.assertEqual(snapshot.get_amount('w0', 'itém1'), catalog.get_amount('w0', 'itém1'))
+        self.assertEqual(snapshot.get_total('itém1'), catalog.get_total('itém1'))
+        self.assertRaises(TypeError, snapshot.adjust_amount, 'w0', 'itém1', 1)
+
+    # a writable snapshot changes a private copy, never the file
+    def test_writable_snapshot(self):
+        write_snapshot(Catalog(self.warehouseDistributionList), self.path)
+
+        snapshot = load_snapshot(self.path, writable=True)
+        amount = snapshot.get_amount('w0', 'itém1')
+        snapshot.adjust_amount('w0', 'itém1', 1)
+
+        self.assertEqual(snapshot.get_amount('w0', 'itém1'), amount + 1)
+        self.assertEqual(load_snapshot(self.path).get_amount('w0', 'itém1'), amount)
+
+    # worker processes can map the snapshot themselves
+    def test_parallel_allocator_from_snapshot(self):
+        catalog = Catalog(self.warehouseDistributionList)
+        write_snapshot(catalog, self.path)
+
+        with ParallelAllocator(processes=2, chunkSize=16, snapshotPath=self.path) as parallelAllocator:
+            shipments = parallelAllocator.allocate_many(self.orders)
+
+        self.assertEqual(shipments, InventoryAllocator.from_catalog(catalog).allocate_many(self.orders))
+
+    # looking up names that are not in the snapshot does not grow the lookup cache
+    def test_unknown_names_are_not_cached(self):
+        write_snapshot(Catalog(self.warehouseDistributionList), self.path)
+
+        snapshot = load_snapshot(self.path)
+        for i in range(1000):
+            self.assertFalse('kiwi%d' % i in snapshot)
+
+        self.assertTrue('itém1' in snapshot)
+        self.assertEqual(snapshot.itemIds.resolved, { 'itém1': snapshot.itemIds['itém1'] })
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as snapshotFile:
+            snapshotFile.write(b'\0' * 256)
+
+        self.assertRaises(ValueError, load_snapshot, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
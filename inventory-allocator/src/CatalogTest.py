@@ -0,0 +1,91 @@
+import unittest
+from Catalog import Catalog
+
+class CatalogTest(unittest.TestCase):
+
+    # an empty warehouse distribution list gives an empty catalog
+    def test_empty_warehouse_distribution_list(self):
+        catalog = Catalog([])
+
+        self.assertFalse('apple' in catalog)
+
+    # totals are summed across warehouses and the distribution keeps the cost order of the warehouses
+    def test_total_and_distribution(self):
+        warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 10 } },
+            { 'name': 'dm', 'inventory': { 'banana': 5, 'orange': 10 } }]
+
+        catalog = Catalog(warehouseDistributionList)
+
+        self.assertEqual(catalog.get_total('orange'), 20)
+        self.assertEqual(catalog.get_distribution('orange'), [('owd', 10), ('dm', 10)])
+        self.assertEqual(catalog.get_distribution('banana'), [('dm', 5)])
+
+    # adjusting an amount updates the warehouse entry and the total, but never below zero
+    def test_adjust_amount(self):
+        catalog = Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5 } }, { 'name': 'dm', 'inventory': { 'apple': 5 } }])
+
+        catalog.adjust_amount('dm', 'apple', -3)
+
+        self.assertEqual(catalog.get_amount('dm', 'apple'), 2)
+        self.assertEqual(catalog.get_total('apple'), 7)
+        self.assertRaises(ValueError, catalog.adjust_amount, 'owd', 'apple', -6)
+        self.assertEqual(catalog.get_distribution('apple'), [('owd', 5), ('dm', 2)])
+
+    # items held by many warehouses are looked up through a CapacityIndex that follows adjusted amounts
+    def test_find_warehouse(self):
+        warehouseCount = Catalog.CAPACITY_INDEX_THRESHOLD * 2
+        catalog = Catalog([{ 'name': 'w%d' % i, 'inventory': { 'apple': i % 5, 'orange': 1 } } for i in range(warehouseCount)])
+
+        self.assertEqual(catalog.find_warehouse('apple', 3), 3)
+        self.assertEqual(catalog.find_warehouse('apple', 5), -1)
+        self.assertEqual(catalog.find_warehouse('orange', 1), 0)
+
+        catalog.adjust_amount('w3', 'apple', -1)
+        catalog.adjust_amount('w40', 'apple', 5)
+
+        self.assertEqual(catalog.find_warehouse('apple', 3), 4)
+        self.assertEqual(catalog.find_warehouse('apple', 5), 40)
+        self.assertTrue('apple' in catalog.capacityIndexes)
+
+    # a warehouse that starts stocking an item gets an entry in cost order, new items are added
+    def test_adjust_amount_new_entry(self):
+        catalog = Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5 } }, { 'name': 'dm', 'inventory': { 'banana': 1 } },
+            { 'name': 'ow', 'inventory': { 'apple': 2 } }])
+
+        catalog.adjust_amount('dm', 'apple', 3)
+        catalog.adjust_amount('ow', 'kiwi', 4)
+
+        self.assertEqual(catalog.get_distribution('apple'), [('owd', 5), ('dm', 3), ('ow', 2)])
+        self.assertEqual(catalog.get_amount('ow', 'apple'), 2)
+        self.assertEqual(catalog.get_total('apple'), 10)
+        self.assertEqual(catalog.get_total('kiwi'), 4)
+        self.assertRaises(ValueError, catalog.adjust_amount, 'owd', 'kiwi', -1)
+        self.assertRaises(KeyError, catalog.adjust_amount, 'nowhere', 'kiwi', 1)
+
+    # warehouses are added as the most expensive one and retired without rebuilding the catalog
+    def test_add_and_retire_warehouse(self):
+        warehouseCount = Catalog.CAPACITY_INDEX_THRESHOLD * 2
+        catalog = Catalog([{ 'name': 'w%d' % i, 'inventory': { 'apple': 1 } } for i in range(warehouseCount)])
+        self.assertEqual(catalog.find_warehouse('apple', 2), -1)
+
+        catalog.add_warehouse('new', { 'apple': 5, 'kiwi': 2 })
+
+        self.assertEqual(catalog.get_warehouse_rank('new'), warehouseCount)
+        self.assertEqual(catalog.get_distribution('apple')[-1], ('new', 5))
+        self.assertEqual(catalog.find_warehouse('apple', 2), warehouseCount)
+        self.assertEqual(catalog.get_total('apple'), warehouseCount + 5)
+        self.assertRaises(ValueError, catalog.add_warehouse, 'new', {})
+
+        catalog.retire_warehouse('w0')
+        catalog.retire_warehouse('new')
+
+        self.assertEqual(catalog.get_distribution('apple')[0], ('w1', 1))
+        self.assertEqual(catalog.get_total('apple'), warehouseCount - 1)
+        self.assertEqual(catalog.get_total('kiwi'), 0)
+        self.assertEqual(catalog.find_warehouse('apple', 1), 0)
+        self.assertEqual(catalog.find_warehouse('apple', 2), -1)
+        self.assertRaises(KeyError, catalog.get_amount, 'w0', 'apple')
+
+
+if __name__ == "__main__":
+    unittest.main()
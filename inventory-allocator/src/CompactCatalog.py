@@ -0,0 +1,179 @@
+import bisect
+from array import array
+
+from CapacityIndex import CapacityIndex
+
+"""
+    CompactCatalog holds the same reverse index as Catalog in a few flat arrays instead of a dict of dicts,
+    and can be used by InventoryAllocator (and everything built on it) in place of Catalog.
+
+    Every warehouse and every item is given an integer id, warehouses in cost order and items in the order
+    they are first seen. The distribution of an item is stored CSR style: the entries of item i are
+    offsets[i] up to offsets[i + 1] of entryWarehouses and amounts, in cost order. A stocked (warehouse, item)
+    pair then costs 12 bytes in two arrays, rather than a tuple, an int and a dict entry in Catalog.
+
+    The layout is fixed when it is built: amounts can be changed with adjust_amount, but a warehouse can only
+    hold items it held when the catalog was built.
+"""
+class CompactCatalog:
+    # items held by fewer warehouses than this are simply scanned, see CapacityIndex.get_index
+    CAPACITY_INDEX_THRESHOLD = CapacityIndex.THRESHOLD
+
+    def __init__(self, warehouseDistributionList):
+        # warehouseNames[warehouse id] = name, the ids are the cost order of the warehouses
+        self.warehouseNames = [ inventoryDistribution['name'] for inventoryDistribution in warehouseDistributionList ]
+        self.warehouseIds = { warehouse: warehouseId for warehouseId, warehouse in enumerate(self.warehouseNames) }
+
+        # itemIds['name of item'] = item id
+        self.itemIds = {}
+        counts = []
+        for inventoryDistribution in warehouseDistributionList:
+            for itemName in inventoryDistribution['inventory']:
+                itemId = self.itemIds.setdefault(itemName, len(counts))
+                if itemId == len(counts):
+                    counts.append(0)
+                counts[itemId] += 1
+
+        self.offsets = array('q', [0]) * (len(counts) + 1)
+        for itemId, count in enumerate(counts):
+            self.offsets[itemId + 1] = self.offsets[itemId] + count
+
+        # filled in cost order, so the entries of every item are sorted by warehouse id
+        self.entryWarehouses = array('i', [0]) * self.offsets[-1]
+        self.amounts = array('q', [0]) * self.offsets[-1]
+        self.totals = array('q', [0]) * len(counts)
+
+        nextEntry = array('q', self.offsets[:-1])
+        for warehouseId, inventoryDistribution in enumerate(warehouseDistributionList):
+            for itemName, itemAmount in inventoryDistribution['inventory'].items():
+                itemId = self.itemIds[itemName]
+                entry = nextEntry[itemId]
+                nextEntry[itemId] += 1
+
+                self.entryWarehouses[entry] = warehouseId
+                self.amounts[entry] = itemAmount
+                self.totals[itemId] += itemAmount
+
+        # capacityIndexes[item id] = CapacityIndex over the amounts of its distribution
+        self.capacityIndexes = {}
+
+        # versions['name of item'] = number of times the stock of the item has changed, see AllocationCache
+        self.versions = {}
+
+    @classmethod
+    def from_buffers(cls, warehouseNames, itemIds, offsets, entryWarehouses, amounts, totals):
+        # builds the catalog around existing buffers without copying them, itemIds only needs to support
+        # `in` and lookup by item name, see CatalogSnapshot
+        compactCatalog = cls.__new__(cls)
+        compactCatalog.warehouseNames = warehouseNames
+        compactCatalog.warehouseIds = { warehouse: warehouseId for warehouseId, warehouse in enumerate(warehouseNames) }
+        compactCatalog.itemIds = itemIds
+        compactCatalog.offsets = offsets
+        compactCatalog.entryWarehouses = entryWarehouses
+        compactCatalog.amounts = amounts
+        compactCatalog.totals = totals
+        compactCatalog.capacityIndexes = {}
+        compactCatalog.versions = {}
+        return compactCatalog
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        # a CompactCatalog of the current amounts of a Catalog
+        inventories = { warehouse: {} for warehouse in sorted(catalog.warehouseRanks, key=catalog.warehouseRanks.get) }
+        for itemName, entry in catalog.catalog.items():
+            for warehouse, amount in entry['distribution']:
+                inventories[warehouse][itemName] = amount
+        return cls([ { 'name': warehouse, 'inventory': inventory } for warehouse, inventory in inventories.items() ])
+
+    def get_item_names(self):
+        # item names in item id order
+        return sorted(self.itemIds, key=self.itemIds.get)
+
+    def __contains__(self, itemName):
+        return itemName in self.itemIds
+
+    def get_total(self, itemName):
+        return self.totals[self.itemIds[itemName]]
+
+    def get_distribution(self, itemName):
+        # warehouses holding the item as (warehouse, amount), cheapest first
+        itemId = self.itemIds[itemName]
+        return CompactDistribution(self, self.offsets[itemId], self.offsets[itemId + 1])
+
+    def get_version(self, itemName):
+        return self.versions.get(itemName, 0)
+
+    def get_warehouse_rank(self, warehouse):
+        # lower ranks are cheaper to ship from
+        return self.warehouseIds[warehouse]
+
+    def _get_entry(self, warehouse, itemId):
+        # the entries of an item are sorted by warehouse id, so the entry of a warehouse is found by bisection
+        warehouseId = self.warehouseIds[warehouse]
+        start, end = self.offsets[itemId], self.offsets[itemId + 1]
+
+        entry = bisect.bisect_left(self.entryWarehouses, warehouseId, start, end)
+        if entry == end or self.entryWarehouses[entry] != warehouseId:
+            raise KeyError(warehouse)
+        return entry
+
+    def get_amount(self, warehouse, itemName):
+        return self.amounts[self._get_entry(warehouse, self.itemIds[itemName])]
+
+    def adjust_amount(self, warehouse, itemName, delta):
+        itemId = self.itemIds[itemName]
+        entry = self._get_entry(warehouse, itemId)
+        amount = self.amounts[entry] + delta
+
+        if amount < 0:
+            raise ValueError('not enough %s at %s to remove %d' % (itemName, warehouse, -delta))
+
+        self.amounts[entry] = amount
+        self.totals[itemId] += delta
+        self.versions[itemName] = self.versions.get(itemName, 0) + 1
+
+        if itemId in self.capacityIndexes:
+            self.capacityIndexes[itemId].update(entry - self.offsets[itemId], amount)
+
+    def _get_amounts(self, itemId):
+        # amounts of the distribution of the item, to build its CapacityIndex from
+        return self.amounts[self.offsets[itemId]:self.offsets[itemId + 1]].tolist()
+
+    def find_warehouse(self, itemName, itemAmount):
+        # position in the distribution of the cheapest warehouse holding at least itemAmount (which
+        # must be positive), -1 if no single warehouse does
+        itemId = self.itemIds[itemName]
+        start, end = self.offsets[itemId], self.offsets[itemId + 1]
+        capacityIndex = CapacityIndex.get_index(self.capacityIndexes, itemId, end - start,
+            self._get_amounts, self.CAPACITY_INDEX_THRESHOLD)
+        if capacityIndex is not None:
+            return capacityIndex.find_first(itemAmount)
+
+        amounts = self.amounts
+        for entry in range(start, end):
+            if itemAmount <= amounts[entry]:
+                return entry - start
+        return -1
+
+class CompactDistribution:
+    # read only view of the entries start up to end of a CompactCatalog as (warehouse, amount) pairs
+    def __init__(self, compactCatalog, start, end):
+        self.compactCatalog = compactCatalog
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, position):
+        if not (0 <= position < self.end - self.start):
+            raise IndexError(position)
+        entry = self.start + position
+        return self.compactCatalog.warehouseNames[self.compactCatalog.entryWarehouses[entry]], self.compactCatalog.amounts[entry]
+
+    def __iter__(self):
+        warehouseNames = self.compactCatalog.warehouseNames
+        entryWarehouses = self.compactCatalog.entryWarehouses
+        amounts = self.compactCatalog.amounts
+        for entry in range(self.start, self.end):
+            yield warehouseNames[entryWarehouses[entry]], amounts[entry]
@@ -0,0 +1,51 @@
+import random
+import unittest
+from Catalog import Catalog
+from CompactCatalog import CompactCatalog
+from InventoryAllocator import InventoryAllocator
+
+class CompactCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 10 } },
+            { 'name': 'dm', 'inventory': { 'banana': 5, 'orange': 10 } }, { 'name': 'om', 'inventory': { } }]
+
+    # totals are summed across warehouses and the distribution keeps the cost order of the warehouses
+    def test_total_and_distribution(self):
+        catalog = CompactCatalog(self.warehouseDistributionList)
+
+        self.assertFalse('kiwi' in catalog)
+        self.assertEqual(catalog.get_total('orange'), 20)
+        self.assertEqual(list(catalog.get_distribution('orange')), [('owd', 10), ('dm', 10)])
+        self.assertEqual(catalog.get_distribution('banana')[0], ('dm', 5))
+        self.assertEqual(len(catalog.get_distribution('apple')), 1)
+
+    # adjusting an amount updates the warehouse entry and the total, but never below zero, and only
+    # for items the warehouse held when the catalog was built
+    def test_adjust_amount(self):
+        catalog = CompactCatalog(self.warehouseDistributionList)
+
+        catalog.adjust_amount('dm', 'orange', -3)
+
+        self.assertEqual(catalog.get_amount('dm', 'orange'), 7)
+        self.assertEqual(catalog.get_total('orange'), 17)
+        self.assertRaises(ValueError, catalog.adjust_amount, 'owd', 'apple', -6)
+        self.assertRaises(KeyError, catalog.adjust_amount, 'om', 'apple', 1)
+
+    # the allocator gives the same shipments with a CompactCatalog as with a Catalog
+    def test_same_shipments_as_catalog(self):
+        rng = random.Random(0)
+        warehouseDistributionList = [ { 'name': 'w%d' % i, 'inventory': { 'item%d' % j: rng.randint(0, 9) for j in range(8) if rng.random() < 0.5 } }
+            for i in range(60) ]
+        orders = [ { 'item%d' % j: rng.randint(0, 60) for j in range(9) if rng.random() < 0.4 } for _ in range(200) ]
+
+        compactAllocator = InventoryAllocator.from_catalog(CompactCatalog(warehouseDistributionList))
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+
+        self.assertEqual(compactAllocator.allocate_many(orders), inventoryAllocator.allocate_many(orders))
+        for order in orders:
+            self.assertEqual(compactAllocator.allocate_inventory(order), inventoryAllocator.allocate_inventory(order))
+
+
+if __name__ == "__main__":
+    unittest.main()
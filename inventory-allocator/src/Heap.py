@@ -61,18 +61,21 @@ class Heap:
         self.perc_down(1)
         return retval
     
-    def update_shipment(self, shipment, itemName, itemAmount):
+    def get_split(self, itemAmount):
+        # (warehouse, amount) taken from each warehouse left in the heap to make up itemAmount
+        split = []
         total = itemAmount
         for warehouse, amount in self.orderedMap.items():
-            if not (warehouse in shipment):
-                shipment[warehouse] = {}
-
             if total <= amount:
-                shipment[warehouse].update({ itemName: total })
-                return
+                split.append((warehouse, total))
+                return split
             else:
                 total -= amount
-                shipment[warehouse].update({ itemName: amount })
-
-
+                split.append((warehouse, amount))
+        return split
 
+    def update_shipment(self, shipment, itemName, itemAmount):
+        for warehouse, amount in self.get_split(itemAmount):
+            if not (warehouse in shipment):
+                shipment[warehouse] = {}
+            shipment[warehouse].update({ itemName: amount })
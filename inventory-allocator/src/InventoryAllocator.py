@@ -1,4 +1,9 @@
-from Heap import Heap
+import threading
+import time
+
+from Catalog import Catalog
+from WarehouseConsolidator import WarehouseConsolidator
+from WarehouseSelector import WarehouseSelector
 
 """
     I use Python 3.7, it is only important because the order of keys is preserved in dictionaries.
@@ -25,81 +30,268 @@ from Heap import Heap
     items can only "move down" the heap only if they are greater than their children. The order of insertion into
     the Heap is based on the cost, so the cheapest to ship from is inserted first with the most expensive inserted
     last.
+
+    The heap used by the allocator is WarehouseSelector, an array based version of Heap that selects the same
+    warehouses and is reused across order lines. Heap is kept as the reference it is tested and benchmarked against.
+
+    One allocator can be shared by several threads as long as the catalog does not change (see AllocationEngine
+    for allocating against stock that does): every thread reuses selectors of its own. An AllocationCache or
+    AllocationStats given to the allocator is not safe to share between threads.
 """
 class InventoryAllocator:
-    def __init__(self, order, warehouseDistributionList):
+    def __init__(self, order=None, warehouseDistributionList=None, catalog=None, cache=None, stats=None):
+        # order is optional so that a single allocator can serve many orders
+        # through allocate_inventory(order) against the same catalog
         self.order = order
-        self.warehouseDistributionList = warehouseDistributionList
-        
-        # catalog works as sort of a reverse index
-        # so we simply use the name of the item we are looking for to 
-        # lookup warehouses that contain the item
-
-        # catalog format 
-        # catalog['name of item'] = {'total': 'total number of all items ', 'distribution': ['warehouse': 'amount']}
-        self.catalog = {}
-        self._create_catalog()
-    
-    def _create_catalog(self):
-        for inventoryDistribution in self.warehouseDistributionList:
-            warehouse = inventoryDistribution['name']
-            inventory = inventoryDistribution['inventory']
-
-            for itemName, itemAmount in inventory.items():
-                # check if item is in catalog
-                if not (itemName in self.catalog):
-                    self.catalog[itemName] = { 'total': 0, 'distribution': [] }
-                
-                self.catalog[itemName]['total'] += itemAmount
-                self.catalog[itemName]['distribution'].append((warehouse, itemAmount))
-    
-    def _create_shipment_from_heap(self, distributionHeap, shipment, itemName, itemAmount):
-        distributionHeap.update_shipment(shipment, itemName, itemAmount)
-    
-    def allocate_inventory(self):
-        shipment = { }
-        
-        for itemName, itemAmount in self.order.items():
+
+        # optional AllocationStats recording where the time goes
+        self.stats = stats
+
+        # the catalog is only built here when one is not provided, see Catalog.py. Without either the
+        # allocator would quietly answer [] to every order
+        if catalog is None:
+            if warehouseDistributionList is None:
+                raise ValueError('a catalog or a warehouse distribution list is required')
+            start = time.perf_counter()
+            catalog = Catalog(warehouseDistributionList)
+            if stats is not None:
+                stats.observe('catalogBuild', time.perf_counter() - start)
+        self.catalog = catalog
+
+        # selectors reused by every order line of a thread, see _get_selectors
+        self.local = threading.local()
+
+        # only created when allocate_consolidated is used
+        self.consolidator = None
+
+        # optional AllocationCache in front of allocate_inventory, created for this catalog
+        if cache is not None and cache.catalog is not catalog:
+            raise ValueError('the cache was created for another catalog')
+        self.cache = cache
+
+    @classmethod
+    def from_catalog(cls, catalog, cache=None, stats=None):
+        return cls(catalog=catalog, cache=cache, stats=stats)
+
+    def _get_selectors(self, count, distribution):
+        # selectors are kept between calls and reset, rather than allocating new ones for every order line,
+        # every thread has its own so that threads never walk the same selector
+        threadSelectors = getattr(self.local, 'selectors', None)
+        if threadSelectors is None:
+            threadSelectors = self.local.selectors = []
+
+        while len(threadSelectors) < count:
+            threadSelectors.append(WarehouseSelector())
+
+        selectors = threadSelectors[:count]
+        for selector in selectors:
+            selector.reset(distribution)
+        return selectors
+
+    def _add_to_shipment(self, shipment, itemName, itemSplit):
+        for warehouse, amount in itemSplit:
+            if not (warehouse in shipment):
+                shipment[warehouse] = {}
+            shipment[warehouse].update({ itemName: amount })
+
+    def _is_fillable(self, order):
+        for itemName, itemAmount in order.items():
             # is item in catalog
             if not (itemName in self.catalog):
-                return []
+                return False
 
-            # can ordered amount be met through some combination of items 
+            # can ordered amount be met through some combination of items
             # contained in available warehouses
-            # if not then no point to continue
-            if itemAmount > self.catalog[itemName]['total']:
-                return []
-            
+            if itemAmount > self.catalog.get_total(itemName):
+                return False
+        return True
+
+    def _allocate_item_amounts(self, itemName, itemAmounts):
+        # Splits every amount in itemAmounts across the warehouses holding itemName. Amounts a single
+        # warehouse can ship are found through Catalog.find_warehouse, the rest are split in a single walk
+        # over the distribution, so a batch of orders walks each item once however many lines order it.
+        # Every amount must be positive and no larger than the total of the item.
+        # Returns splits[itemAmount] = [(warehouse, amount)], cheapest warehouse first
+        splits = {}
+        pending = []
+        distribution = self.catalog.get_distribution(itemName)
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        for itemAmount in sorted(itemAmounts):
+            # can the amount be found at a single warehouse, once an amount cannot
+            # no larger amount can either
+            if not pending:
+                index = self.catalog.find_warehouse(itemName, itemAmount)
+                if index >= 0:
+                    splits[itemAmount] = [ (distribution[index][0], itemAmount) ]
+                    if stats is not None:
+                        stats.observe_line(index + 1)
+                    continue
+            pending.append(itemAmount)
+
+        if stats is not None:
+            stats.observe('scan', time.perf_counter() - start)
+
+        if not pending:
+            return splits
+
+        # no single warehouse holds any of the pending amounts, so every warehouse is a candidate
+        # to split them across
+        self._split_across(distribution, self.catalog.get_total(itemName), pending, splits)
+        return splits
+
+    def _split_across(self, distribution, itemTotalAmount, pending, splits):
+        # Splits every amount in pending across the warehouses of distribution, whose amounts add up to
+        # itemTotalAmount, when none of them can be found at a single warehouse
+        selectors = self._get_selectors(len(pending), distribution)
+        if self.stats is not None:
+            start = time.perf_counter()
+
+        for index, (warehouse, amountInWarehouse) in enumerate(distribution):
+            itemTotalAmount -= amountInWarehouse
+            for itemAmount, selector in zip(pending, selectors):
+                selector.insert(index, amountInWarehouse)
+
+                # To order from as few warehouses as possible 
+                # We only want to store as few options in our selector as possible
+                # The rule for removing items from our selector is once the total of all items in the 
+                # selector is greater than the ordered amount, we want to check that if by removing the smallest item in 
+                # our selector, we still have a total that is atleast as large as the ordered amount
+                if selector.total - selector.get_min_amount() >= itemAmount:
+                    # eject smallest
+                    selector.del_min()
+
+            # once itemTotalAmount is zero, then we have viewed every possible warehouse
+            if itemTotalAmount == 0:
+                if self.stats is not None:
+                    self._observe_split(start, index + 1, selectors)
+                for itemAmount, selector in zip(pending, selectors):
+                    splits[itemAmount] = selector.get_split(itemAmount)
+                break
+
+    def _observe_split(self, start, warehousesScanned, selectors):
+        # every warehouse scanned went into every selector, the ones not left in a selector were ejected
+        self.stats.observe('split', time.perf_counter() - start)
+        for selector in selectors:
+            self.stats.observe_line(warehousesScanned)
+            self.stats.count('selectorInserts', warehousesScanned)
+            self.stats.count('selectorEjections', warehousesScanned - selector.currentSize)
+
+    def allocate_inventory(self, order=None):
+        if order is None:
+            order = self.order
+        if self.stats is not None:
+            start = time.perf_counter()
+
+        if self.cache is not None:
+            shipment = self.cache.allocate(order, self._allocate_inventory)
+        else:
+            shipment = self._allocate_inventory(order)
+
+        if self.stats is not None:
+            self.stats.observe('allocate', time.perf_counter() - start)
+        return shipment
+
+    def _allocate_inventory(self, order):
+        # every line is checked against the totals of the catalog before any of them is split, so an order
+        # that cannot be filled costs a dict lookup per line and no split is thrown away
+        if not self._is_fillable(order):
+            return self._exit_early()
+
+        shipment = { }
+
+        for itemName, itemAmount in order.items():
             if itemAmount <= 0:
                 continue
-            
-            distributionHeap = Heap()
-            itemTotalAmount = self.catalog[itemName]['total']
-
-            for warehouse, amountInWarehouse in self.catalog[itemName]['distribution']:
-                if itemAmount <= amountInWarehouse:
-                    # if we get into if statement means our order for a particular item
-                    # can be found at a single warehouse
-                    if not (warehouse in shipment):
-                        shipment[warehouse] = {}
-                    shipment[warehouse].update({ itemName: itemAmount })
-                    break
-                else:
-                    itemTotalAmount -= amountInWarehouse
-                    distributionHeap.insert((warehouse, amountInWarehouse))
-
-                    # To order from as few warehouses as possible 
-                    # We only want to store as few options in our heap as possible
-                    # The rule for removing items from our Heap is once the total of all items in the 
-                    # Heap is greater than the ordered amount, we want to check that if by removing the smallest item in 
-                    # our heap, we still have a total that is atleast as large as the ordered amount
-                    if distributionHeap.total - distributionHeap.get_min_child()[1] >= itemAmount:
-                        # eject smallest
-                        distributionHeap.del_min()
-                    
-                    # once itemTotalAmount is zero, then we have viewed every possible warehouse
-                    if itemTotalAmount == 0:
-                        # process amount
-                        self._create_shipment_from_heap(distributionHeap, shipment, itemName, itemAmount)
-                        break
+
+            self._add_to_shipment(shipment, itemName, self._allocate_item_amounts(itemName, (itemAmount,))[itemAmount])
+        return [ { warehouse: order } for warehouse, order in shipment.items() ]
+
+    def allocate_partial(self, order):
+        # Allocates the lines of order that can be filled instead of returning [] for the whole order.
+        # Returns (shipment, shortLines), shortLines['name of item'] = {'requested': amount, 'available': amount}
+        # for every line asking for more than the warehouses hold in total. Lines of zero or less are left out
+        shortLines = {}
+        fillableLines = {}
+        for itemName, itemAmount in order.items():
+            if itemAmount <= 0:
+                continue
+
+            available = self.catalog.get_total(itemName) if itemName in self.catalog else 0
+            if itemAmount > available:
+                shortLines[itemName] = { 'requested': itemAmount, 'available': available }
+            else:
+                fillableLines[itemName] = itemAmount
+
+        return self.allocate_inventory(fillableLines), shortLines
+
+    def _exit_early(self):
+        if self.stats is not None:
+            self.stats.count('earlyExits')
+        return []
+
+    def allocate_many(self, orders):
+        # Allocates every order of the batch against the same catalog and returns their shipments in order.
+        # Each item is split once per distinct amount ordered in the batch, see _allocate_item_amounts
+        orders = list(orders)
+        if self.stats is not None:
+            start = time.perf_counter()
+
+        itemAmounts = {}
+        for order in orders:
+            if self._is_fillable(order):
+                for itemName, itemAmount in order.items():
+                    if itemAmount > 0:
+                        itemAmounts.setdefault(itemName, set()).add(itemAmount)
+
+        splits = { itemName: self._allocate_item_amounts(itemName, amounts) for itemName, amounts in itemAmounts.items() }
+
+        shipments = []
+        for order in orders:
+            shipment = { }
+            if self._is_fillable(order):
+                for itemName, itemAmount in order.items():
+                    if itemAmount > 0:
+                        self._add_to_shipment(shipment, itemName, splits[itemName][itemAmount])
+            elif self.stats is not None:
+                self.stats.count('earlyExits')
+            shipments.append([ { warehouse: order } for warehouse, order in shipment.items() ])
+
+        if self.stats is not None:
+            self.stats.observe('batch', time.perf_counter() - start)
+        return shipments
+
+    def _split_within(self, itemName, itemAmount, warehouses):
+        # splits itemAmount the same way as _allocate_item_amounts, but only across the given warehouses
+        distribution = [ (warehouse, amountInWarehouse) for warehouse, amountInWarehouse in self.catalog.get_distribution(itemName)
+            if warehouse in warehouses ]
+
+        for warehouse, amountInWarehouse in distribution:
+            if itemAmount <= amountInWarehouse:
+                return [ (warehouse, itemAmount) ]
+
+        splits = {}
+        self._split_across(distribution, sum(amount for warehouse, amount in distribution), [ itemAmount ], splits)
+        return splits[itemAmount]
+
+    def allocate_consolidated(self, order, timeBudget=None):
+        # Allocates the whole order from as few distinct warehouses as possible, see WarehouseConsolidator.
+        # If the search takes longer than timeBudget seconds the order is allocated by allocate_inventory instead
+        if self.consolidator is None:
+            self.consolidator = WarehouseConsolidator(self.catalog)
+
+        if not self._is_fillable(order):
+            return []
+
+        lines = { itemName: itemAmount for itemName, itemAmount in order.items() if itemAmount > 0 }
+        warehouses = self.consolidator.find_warehouses(lines, timeBudget) if lines else set()
+        if warehouses is None:
+            return self.allocate_inventory(order)
+
+        warehouses = set(warehouses)
+        shipment = { }
+        for itemName, itemAmount in lines.items():
+            self._add_to_shipment(shipment, itemName, self._split_within(itemName, itemAmount, warehouses))
         return [ { warehouse: order } for warehouse, order in shipment.items() ]
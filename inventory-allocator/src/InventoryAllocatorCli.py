@@ -0,0 +1,123 @@
+import argparse
+import json
+import sys
+import time
+
+from Catalog import Catalog
+from CatalogSnapshot import load_snapshot, write_snapshot
+from InventoryAllocator import InventoryAllocator
+from ParallelAllocator import ParallelAllocator, iter_batches
+
+try:
+    import resource
+except ImportError:
+    # resource is only available on Unix, peak memory is simply not reported elsewhere
+    resource = None
+
+"""
+    Command line runner for the allocator.
+
+    The warehouse distribution list is read once at startup from a JSON file, or a snapshot written by
+    --write-snapshot (see CatalogSnapshot) is memory-mapped instead. Orders are streamed
+    as JSON Lines (one order per line) from a file or stdin and the shipment of every order is written
+    as one JSON line, in the same order, as soon as its batch is allocated. Only one batch of orders
+    is held in memory at a time, so memory stays flat however large the input is.
+
+    python InventoryAllocatorCli.py --warehouses warehouses.json orders.jsonl > shipments.jsonl
+    cat orders.jsonl | python InventoryAllocatorCli.py --warehouses warehouses.json --stats
+    python InventoryAllocatorCli.py --warehouses warehouses.json --processes 4 orders.jsonl > shipments.jsonl
+    python InventoryAllocatorCli.py --warehouses warehouses.json --write-snapshot inventory.snap < /dev/null
+    python InventoryAllocatorCli.py --snapshot inventory.snap --processes 4 orders.jsonl > shipments.jsonl
+"""
+
+def read_orders(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def load_catalog(warehousesPath, snapshotPath):
+    # the catalog of a warehouse distribution list JSON file, or of a memory-mapped snapshot
+    if snapshotPath is not None:
+        return load_snapshot(snapshotPath)
+
+    with open(warehousesPath) as warehousesFile:
+        return Catalog(json.load(warehousesFile))
+
+def run(inventoryAllocator, inputLines, output, batchSize=1000):
+    # returns the number of orders that were allocated
+    batches = iter_batches(read_orders(inputLines), batchSize)
+    if isinstance(inventoryAllocator, ParallelAllocator):
+        shipmentBatches = inventoryAllocator.imap_batches(batches)
+    else:
+        shipmentBatches = map(inventoryAllocator.allocate_many, batches)
+
+    orderCount = 0
+    for shipments in shipmentBatches:
+        for shipment in shipments:
+            output.write(json.dumps(shipment))
+            output.write('\n')
+        output.flush()
+        orderCount += len(shipments)
+    return orderCount
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Allocate a stream of JSON Lines orders against a warehouse distribution list.')
+    parser.add_argument('orders', nargs='?', default='-', help='JSON Lines file of orders, - (the default) reads stdin')
+    catalogSource = parser.add_mutually_exclusive_group(required=True)
+    catalogSource.add_argument('--warehouses', help='JSON file holding the warehouse distribution list')
+    catalogSource.add_argument('--snapshot', help='catalog snapshot to memory-map instead of reading the warehouses')
+    parser.add_argument('--write-snapshot', help='write a snapshot of the catalog to this path at startup')
+    parser.add_argument('--output', default='-', help='file to write the shipments to, - (the default) writes stdout')
+    parser.add_argument('--batch-size', type=int, default=1000, help='number of orders allocated together')
+    parser.add_argument('--processes', type=int, default=1, help='number of worker processes allocating batches in parallel')
+    parser.add_argument('--stats', action='store_true', help='report throughput and peak memory on stderr')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    catalog = load_catalog(args.warehouses, args.snapshot)
+
+    if args.write_snapshot is not None:
+        write_snapshot(catalog, args.write_snapshot)
+
+    if args.processes > 1 and args.snapshot is not None:
+        # every worker maps the snapshot itself rather than being sent a copy of the catalog
+        inventoryAllocator = ParallelAllocator(processes=args.processes, chunkSize=args.batch_size, snapshotPath=args.snapshot)
+    elif args.processes > 1:
+        inventoryAllocator = ParallelAllocator(catalog, args.processes, args.batch_size)
+    else:
+        inventoryAllocator = InventoryAllocator.from_catalog(catalog)
+
+    inputFile = sys.stdin if args.orders == '-' else open(args.orders)
+    outputFile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        start = time.perf_counter()
+        orderCount = run(inventoryAllocator, inputFile, outputFile, args.batch_size)
+        seconds = time.perf_counter() - start
+    finally:
+        if inputFile is not sys.stdin:
+            inputFile.close()
+        if outputFile is not sys.stdout:
+            outputFile.close()
+        if isinstance(inventoryAllocator, ParallelAllocator):
+            inventoryAllocator.close()
+
+    if args.stats:
+        message = 'allocated %d orders in %.3fs (%.0f orders/sec)' % (orderCount, seconds, orderCount / seconds if seconds else 0)
+        peakMemory = peak_memory_mb()
+        if peakMemory is not None:
+            message += ', peak RSS %.1f MB' % peakMemory
+        print(message, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import InventoryAllocatorCli
+from Catalog import Catalog
+from InventoryAllocator import InventoryAllocator
+
+class InventoryAllocatorCliTest(unittest.TestCase):
+
+    def setUp(self):
+        self.warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5 } }, { 'name': 'dm', 'inventory': { 'apple': 5, 'orange': 2 } }]
+        self.orders = [{ 'apple': 10 }, { 'orange': 3 }, { 'apple': 1, 'orange': 2 }]
+
+    # shipments are written one JSON line per order, in order, even when the orders are split over several batches
+    def test_run_streams_shipments_in_order(self):
+        inputLines = io.StringIO('\n'.join(json.dumps(order) for order in self.orders) + '\n\n')
+        output = io.StringIO()
+
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(self.warehouseDistributionList))
+        orderCount = InventoryAllocatorCli.run(inventoryAllocator, inputLines, output, batchSize=2)
+
+        self.assertEqual(orderCount, 3)
+        self.assertEqual([ json.loads(line) for line in output.getvalue().splitlines() ],
+            [[{ 'owd': { 'apple': 5 } }, { 'dm': { 'apple': 5 } }], [], [{ 'owd': { 'apple': 1 } }, { 'dm': { 'orange': 2 } }]])
+
+    # the warehouses are read from a JSON file and the orders from a JSON Lines file
+    def test_main_with_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            warehousesPath = os.path.join(directory, 'warehouses.json')
+            ordersPath = os.path.join(directory, 'orders.jsonl')
+            outputPath = os.path.join(directory, 'shipments.jsonl')
+
+            with open(warehousesPath, 'w') as warehousesFile:
+                json.dump(self.warehouseDistributionList, warehousesFile)
+            with open(ordersPath, 'w') as ordersFile:
+                ordersFile.writelines(json.dumps(order) + '\n' for order in self.orders)
+
+            InventoryAllocatorCli.main(['--warehouses', warehousesPath, '--output', outputPath, ordersPath])
+
+            with open(outputPath) as outputFile:
+                shipments = [ json.loads(line) for line in outputFile ]
+
+        self.assertEqual(shipments, [ InventoryAllocator(order, self.warehouseDistributionList).allocate_inventory() for order in self.orders ])
+
+
+if __name__ == "__main__":
+    unittest.main()
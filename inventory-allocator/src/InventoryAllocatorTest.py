@@ -1,5 +1,11 @@
+import sys
+import threading
+import time
 import unittest
+from Catalog import Catalog
 from InventoryAllocator import InventoryAllocator
+from WorkloadGenerator import WorkloadGenerator
+from WarehouseConsolidator import WarehouseConsolidator
 
 class InventoryAllocatorTest(unittest.TestCase):
 
@@ -258,7 +264,156 @@ class InventoryAllocatorTest(unittest.TestCase):
         shipment = inventoryAllocator.allocate_inventory()
 
         self.assertEqual(shipment, [{ 'om': { 'apple': 10 } }])
-    
+
+    # A catalog built once should serve many orders and give the same shipments as building it per order
+    def test_many_orders_against_one_catalog(self):
+        warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 3 } }, { 'name': 'dm', 'inventory': { 'apple': 5 } },
+        { 'name': 'om', 'inventory': { 'apple': 10, 'banana': 2 }} ]
+        orders = [{ 'apple': 10 }, { 'apple': 4, 'orange': 3 }, { 'banana': 3 }, { 'apple': 20, 'banana': 2 }]
+
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+
+        for order in orders:
+            expectedShipment = InventoryAllocator(order, warehouseDistributionList).allocate_inventory()
+            self.assertEqual(inventoryAllocator.allocate_inventory(order), expectedShipment)
+
+    # A batch of orders gives the same shipments, in the same order, as allocating the orders one by one
+    def test_allocate_many(self):
+        warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 3 } }, { 'name': 'dm', 'inventory': { 'apple': 5 } },
+        { 'name': 'om', 'inventory': { 'apple': 6, 'banana': 2 }} ]
+        orders = [{ 'apple': 11 }, { 'apple': 4, 'orange': 3 }, { 'banana': 3 }, { 'apple': 11, 'banana': 2 }, { 'apple': 6, 'kiwi': 0 },
+            { }, { 'apple': 0, 'orange': 2 }, { 'apple': 10 }]
+
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+        shipments = inventoryAllocator.allocate_many(iter(orders))
+
+        self.assertEqual(shipments, [inventoryAllocator.allocate_inventory(order) for order in orders])
+        self.assertEqual(shipments[0], [{ 'owd': { 'apple': 5 }}, { 'om': { 'apple': 6 } }])
+        self.assertEqual(shipments[2], [])
+
+    # Allocating the whole order at once can ship it from fewer warehouses than allocating every item on its own
+    def test_allocate_consolidated(self):
+        order = { 'apple': 5, 'orange': 5, 'banana': 5 }
+        warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5 } }, { 'name': 'dm', 'inventory': { 'orange': 5 } },
+        { 'name': 'om', 'inventory': { 'banana': 5, 'apple': 5 } }, { 'name': 'ow', 'inventory': { 'orange': 5, 'banana': 5 } },
+        { 'name': 'do', 'inventory': { 'apple': 5, 'orange': 5, 'banana': 2 } }]
+
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+
+        self.assertEqual(inventoryAllocator.allocate_inventory(order), [{ 'owd': { 'apple': 5 } }, { 'dm': { 'orange': 5 } }, { 'om': { 'banana': 5 } }])
+        self.assertEqual(inventoryAllocator.allocate_consolidated(order), [{ 'owd': { 'apple': 5 } }, { 'ow': { 'orange': 5, 'banana': 5 } }])
+        self.assertEqual(inventoryAllocator.allocate_consolidated({ 'apple': 6, 'kiwi': 0 }), [])
+        self.assertEqual(inventoryAllocator.allocate_consolidated({ 'apple': 0 }), [])
+
+    # An item is split across the chosen warehouses only, and among the smallest sets of warehouses the cheapest one is chosen
+    def test_allocate_consolidated_split(self):
+        order = { 'apple': 10, 'orange': 1 }
+        warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 6 } }, { 'name': 'dm', 'inventory': { 'apple': 4, 'orange': 1 } },
+        { 'name': 'om', 'inventory': { 'apple': 9, 'orange': 1 } }, { 'name': 'ow', 'inventory': { 'apple': 1 } }]
+
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+
+        self.assertEqual(inventoryAllocator.allocate_inventory(order), [{ 'owd': { 'apple': 6 } }, { 'om': { 'apple': 4 } }, { 'dm': { 'orange': 1 } }])
+        self.assertEqual(inventoryAllocator.allocate_consolidated(order), [{ 'owd': { 'apple': 6 } }, { 'dm': { 'apple': 4, 'orange': 1 } }])
+
+    # Once the time budget is used up the order is allocated item by item
+    def test_allocate_consolidated_out_of_time(self):
+        order = { 'apple': 5, 'orange': 5, 'banana': 5 }
+        warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5 } }, { 'name': 'dm', 'inventory': { 'orange': 5 } },
+        { 'name': 'om', 'inventory': { 'banana': 5, 'apple': 5, 'orange': 5 } }]
+
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(warehouseDistributionList))
+        inventoryAllocator.consolidator = WarehouseConsolidator(inventoryAllocator.catalog)
+        inventoryAllocator.consolidator.DEADLINE_CHECK_INTERVAL = 1
+
+        self.assertEqual(inventoryAllocator.allocate_consolidated(order, timeBudget=-1), inventoryAllocator.allocate_inventory(order))
+        self.assertEqual(inventoryAllocator.allocate_consolidated(order), [{ 'om': { 'apple': 5, 'orange': 5, 'banana': 5 } }])
+
+    # When the deadline passes after the greedy pass, the greedy set is used rather than allocating item by item
+    def test_consolidation_out_of_time_uses_greedy_set(self):
+        lines = { 'apple': 4, 'orange': 4 }
+        catalog = Catalog([{ 'name': 'owd', 'inventory': { 'apple': 3, 'orange': 3 } }, { 'name': 'dm', 'inventory': { 'apple': 4 } },
+        { 'name': 'om', 'inventory': { 'orange': 4 } }])
+
+        # only the exact search is given a deadline that has passed
+        class ExactSearchOutOfTime(WarehouseConsolidator):
+            DEADLINE_CHECK_INTERVAL = 1
+
+            def _get_coverage(self, lines, deadline):
+                return WarehouseConsolidator._get_coverage(self, lines, float('inf'))
+
+            def _find_greedy(self, candidates, lines, deadline):
+                return WarehouseConsolidator._find_greedy(self, candidates, lines, float('inf'))
+
+        self.assertEqual(WarehouseConsolidator(catalog).find_warehouses(lines), ['dm', 'om'])
+        self.assertEqual(ExactSearchOutOfTime(catalog).find_warehouses(lines, timeBudget=-1), ['owd', 'dm', 'om'])
+        self.assertEqual(WarehouseConsolidator(catalog).find_warehouses(lines, timeBudget=-1), None)
+
+    # With many candidate warehouses the whole search, not only the exact part of it, stays within the time budget
+    def test_allocate_consolidated_stays_within_budget(self):
+        workload = WorkloadGenerator(1000, 2000, 300, linesPerOrder=20)
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(workload.generate_warehouses()))
+        timeBudget = 0.005
+
+        for order in workload.generate_orders(10):
+            start = time.perf_counter()
+            shipment = inventoryAllocator.allocate_inventory(order)
+            fallbackSeconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            consolidatedShipment = inventoryAllocator.allocate_consolidated(order, timeBudget)
+            seconds = time.perf_counter() - start
+
+            self.assertEqual(bool(consolidatedShipment), bool(shipment))
+            self.assertLess(seconds, timeBudget + 2 * fallbackSeconds + 0.005)
+
+    # Threads sharing one allocator over a read only catalog get the same shipments as a single thread
+    def test_allocator_shared_between_threads(self):
+        workload = WorkloadGenerator(100, 200, 50, linesPerOrder=3, maxOrderAmount=60)
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog(workload.generate_warehouses()))
+        orders = workload.generate_orders(2000)
+        expectedShipments = [ inventoryAllocator.allocate_inventory(order) for order in orders ]
+
+        shipments = [ None ] * len(orders)
+        def run(thread):
+            for i in range(thread, len(orders), 4):
+                shipments[i] = inventoryAllocator.allocate_inventory(orders[i])
+
+        switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [ threading.Thread(target=run, args=(thread,)) for thread in range(4) ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switchInterval)
+
+        self.assertEqual(shipments, expectedShipments)
+
+    # An order short of any item is rejected before any of its lines is split
+    def test_unfillable_order_is_rejected_before_splitting(self):
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5 } }, { 'name': 'dm', 'inventory': { 'apple': 5 } }]))
+        inventoryAllocator._allocate_item_amounts = None
+
+        self.assertEqual(inventoryAllocator.allocate_inventory({ 'apple': 10, 'orange': 1 }), [])
+        self.assertEqual(inventoryAllocator.allocate_inventory({ 'apple': 10, 'banana': 0 }), [])
+        self.assertEqual(inventoryAllocator.allocate_inventory({ 'apple': 11 }), [])
+
+    # Partial fill ships the lines that can be filled and reports the short ones
+    def test_allocate_partial(self):
+        order = { 'apple': 10, 'orange': 3, 'banana': 1, 'kiwi': 0 }
+        inventoryAllocator = InventoryAllocator.from_catalog(Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 2 } },
+            { 'name': 'dm', 'inventory': { 'apple': 5 } }]))
+
+        self.assertEqual(inventoryAllocator.allocate_inventory(order), [])
+        self.assertEqual(inventoryAllocator.allocate_partial(order), ([{ 'owd': { 'apple': 5 } }, { 'dm': { 'apple': 5 } }], {
+            'orange': { 'requested': 3, 'available': 2 },
+            'banana': { 'requested': 1, 'available': 0 },
+        }))
+        self.assertEqual(inventoryAllocator.allocate_partial({ 'apple': 2 }), ([{ 'owd': { 'apple': 2 } }], {}))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+    Applies a feed of inventory changes to a catalog that is already built, instead of building it again.
+
+    Every line of the feed changes the amount of one item at one warehouse:
+        owd apple +5        5 more apples at owd
+        owd apple -3        3 apples fewer at owd
+        owd apple =10       owd now holds 10 apples
+    The warehouse is the first word and the change the last one, so item names can contain spaces.
+    Blank lines and lines starting with # are skipped.
+
+    A change costs a dict lookup and an update of the distribution entry and total, plus O(log warehouses)
+    if the item has a CapacityIndex. The first time a warehouse stocks an item the entry has to be inserted
+    in cost order, which is O(warehouses holding the item). A CompactCatalog only accepts changes to
+    (warehouse, item) pairs it was built with and raises KeyError for any other.
+"""
+
+OPERATIONS = { '+': 'add', '-': 'remove', '=': 'set' }
+
+def parse_delta(line):
+    # returns (warehouse, item name, operation, amount) with operation one of 'add', 'remove' or 'set'
+    fields = line.split()
+    if len(fields) < 3 or not (fields[-1][:1] in OPERATIONS) or not fields[-1][1:].isdigit():
+        raise ValueError('not an inventory delta: %r' % line)
+
+    change = fields[-1]
+    return fields[0], ' '.join(fields[1:-1]), OPERATIONS[change[0]], int(change[1:])
+
+def apply_delta(catalog, warehouse, itemName, operation, amount):
+    if operation == 'add':
+        catalog.adjust_amount(warehouse, itemName, amount)
+    elif operation == 'remove':
+        catalog.adjust_amount(warehouse, itemName, -amount)
+    elif operation == 'set':
+        try:
+            currentAmount = catalog.get_amount(warehouse, itemName)
+        except KeyError:
+            currentAmount = 0
+        catalog.adjust_amount(warehouse, itemName, amount - currentAmount)
+    else:
+        raise ValueError('unknown operation %s' % operation)
+
+def iter_deltas(lines):
+    # parses every delta in lines (an iterable of feed lines), skipping blank lines and comments
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield parse_delta(line)
+
+def apply_deltas(catalog, lines):
+    # applies every delta in lines in order and returns how many were applied
+    count = 0
+    for delta in iter_deltas(lines):
+        apply_delta(catalog, *delta)
+        count += 1
+    return count
@@ -0,0 +1,48 @@
+import unittest
+from Catalog import Catalog
+from CompactCatalog import CompactCatalog
+from InventoryAllocator import InventoryAllocator
+from InventoryDeltaFeed import apply_deltas, parse_delta
+
+class InventoryDeltaFeedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.warehouseDistributionList = [{ 'name': 'owd', 'inventory': { 'apple': 5, 'tissue box': 2 } },
+            { 'name': 'dm', 'inventory': { 'apple': 5, 'orange': 10 } }]
+
+    # the change is the last word, so item names can contain spaces
+    def test_parse_delta(self):
+        self.assertEqual(parse_delta('owd apple +5'), ('owd', 'apple', 'add', 5))
+        self.assertEqual(parse_delta('owd tissue box -2'), ('owd', 'tissue box', 'remove', 2))
+        self.assertEqual(parse_delta(' dm orange =0\n'), ('dm', 'orange', 'set', 0))
+        self.assertRaises(ValueError, parse_delta, 'owd apple')
+        self.assertRaises(ValueError, parse_delta, 'owd apple 5')
+        self.assertRaises(ValueError, parse_delta, 'owd apple +five')
+
+    # deltas change the catalog in place and later orders are allocated from the new amounts
+    def test_apply_deltas(self):
+        catalog = Catalog(self.warehouseDistributionList)
+        inventoryAllocator = InventoryAllocator.from_catalog(catalog)
+
+        count = apply_deltas(catalog, ['# restock', 'owd apple -5', '', 'dm apple =7', 'owd orange +3', 'owd tissue box -1'])
+
+        self.assertEqual(count, 4)
+        self.assertEqual(catalog.get_total('apple'), 7)
+        self.assertEqual(catalog.get_distribution('orange'), [('owd', 3), ('dm', 10)])
+        self.assertEqual(inventoryAllocator.allocate_inventory({ 'apple': 7, 'orange': 3, 'tissue box': 1 }),
+            [{ 'dm': { 'apple': 7 } }, { 'owd': { 'orange': 3, 'tissue box': 1 } }])
+        self.assertRaises(ValueError, apply_deltas, catalog, ['owd apple -1'])
+
+    # a CompactCatalog takes deltas for the (warehouse, item) pairs it was built with only
+    def test_apply_deltas_compact_catalog(self):
+        compactCatalog = CompactCatalog(self.warehouseDistributionList)
+
+        apply_deltas(compactCatalog, ['owd apple =1', 'dm orange -4'])
+
+        self.assertEqual(compactCatalog.get_total('apple'), 6)
+        self.assertEqual(compactCatalog.get_total('orange'), 6)
+        self.assertRaises(KeyError, apply_deltas, compactCatalog, ['owd orange +3'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import json
+import time
+
+from AllocationService import AllocationService
+from Benchmark import generate_orders, generate_warehouses, print_results
+from Catalog import Catalog
+from InventoryAllocator import InventoryAllocator
+
+"""
+    Load generator for AllocationService, reports the latency percentiles and throughput of allocation requests.
+
+    Every connection sends its orders one at a time and waits for each answer, so `connections` requests are
+    in flight at once. Without --port a service is started in the same process on generated warehouses, once
+    for every --window given, so runs with and without coalescing can be compared.
+
+    python LoadGenerator.py --connections 64 --requests 20000 --window 0 0.001 0.005
+    python LoadGenerator.py --port 8765 --items 500
+"""
+
+def percentile(sortedValues, fraction):
+    return sortedValues[min(len(sortedValues) - 1, int(len(sortedValues) * fraction))]
+
+async def _run_connection(host, port, orders, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for order in orders:
+            start = time.perf_counter()
+            writer.write(json.dumps(order).encode('utf-8') + b'\n')
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+
+            if 'error' in response:
+                raise RuntimeError(response['error'])
+    finally:
+        writer.close()
+
+async def generate_load(host, port, orders, connections):
+    # sends orders over `connections` connections and returns the throughput and latency percentiles
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[ _run_connection(host, port, orders[i::connections], latencies) for i in range(connections) ])
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'requestsPerSec': len(latencies) / seconds,
+        'p50Ms': percentile(latencies, 0.5) * 1e3,
+        'p99Ms': percentile(latencies, 0.99) * 1e3,
+        'maxMs': latencies[-1] * 1e3,
+    }
+
+async def run_local(args, orders):
+    # one in process service for every window
+    inventoryAllocator = InventoryAllocator.from_catalog(Catalog(generate_warehouses(args.warehouses, args.items, args.items_per_warehouse)))
+
+    results = []
+    for window in args.window:
+        service = await AllocationService(inventoryAllocator, window).start()
+        try:
+            row = { 'windowMs': window * 1e3 }
+            row.update(await generate_load('127.0.0.1', service.port, orders, args.connections))
+            row['meanBatchSize'] = row['requests'] / sum(service.batchSizes.values())
+            results.append(row)
+        finally:
+            await service.close()
+    return results
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Generate allocation requests against an AllocationService.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help='port of a running service, by default one is started in this process')
+    parser.add_argument('--connections', type=int, default=32, help='number of requests in flight at once')
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--lines', type=int, default=3, help='lines per order')
+    parser.add_argument('--items', type=int, default=500, help='number of distinct items, must match the service warehouses')
+    parser.add_argument('--warehouses', type=int, default=300, help='warehouses of the in process service')
+    parser.add_argument('--items-per-warehouse', type=int, default=50, help='items held by each warehouse of the in process service')
+    parser.add_argument('--window', type=float, nargs='+', default=[0, 0.002], help='coalescing windows of the in process service')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    orders = generate_orders(args.requests, args.items, args.lines)
+
+    if args.port is None:
+        results = asyncio.run(run_local(args, orders))
+    else:
+        results = [asyncio.run(generate_load(args.host, args.port, orders, args.connections))]
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import collections
+import itertools
+import multiprocessing
+import os
+import time
+
+from CatalogSnapshot import load_snapshot
+from InventoryAllocator import InventoryAllocator
+
+"""
+    Allocates batches of independent orders on several cores.
+
+    Every worker process gets its own read-only copy of the catalog once, when the pool starts
+    (on platforms that fork the copy is shared with the parent until it is written to). Given the path
+    of a snapshot instead (see CatalogSnapshot), every worker maps the same file so the catalog is
+    shared through the page cache and never copied.
+
+    Orders are sent to the workers in chunks and the shipments come back in the same order as the
+    orders, so the results are identical to InventoryAllocator.allocate_many.
+"""
+
+# allocator of the worker process, set once by _init_worker
+_workerAllocator = None
+
+def _init_worker(catalog, snapshotPath):
+    global _workerAllocator
+    if snapshotPath is not None:
+        catalog = load_snapshot(snapshotPath)
+    _workerAllocator = InventoryAllocator.from_catalog(catalog)
+
+def _allocate_chunk(orders):
+    return _workerAllocator.allocate_many(orders)
+
+def iter_batches(iterable, batchSize):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batchSize))
+        if not batch:
+            return
+        yield batch
+
+class ParallelAllocator:
+    def __init__(self, catalog=None, processes=None, chunkSize=500, snapshotPath=None):
+        # the workers either copy catalog or map snapshotPath, see _init_worker
+        if (catalog is None) == (snapshotPath is None):
+            raise ValueError('exactly one of catalog and snapshotPath is required')
+
+        self.processes = processes or os.cpu_count() or 1
+        self.chunkSize = chunkSize
+
+        # at most this many chunks are waiting on the workers, which bounds memory when
+        # the orders come from a stream
+        self.maxPendingChunks = self.processes * 2
+        self.pool = multiprocessing.Pool(self.processes, initializer=_init_worker, initargs=(catalog, snapshotPath))
+
+    def imap_batches(self, batches):
+        # yields the shipments of every batch of orders, in order
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(self.pool.apply_async(_allocate_chunk, (batch,)))
+            if len(pending) >= self.maxPendingChunks:
+                yield pending.popleft().get()
+
+        while pending:
+            yield pending.popleft().get()
+
+    def allocate_many(self, orders):
+        shipments = []
+        for chunkShipments in self.imap_batches(iter_batches(orders, self.chunkSize)):
+            shipments.extend(chunkShipments)
+        return shipments
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def measure_scaling(catalog, orders, processCounts, chunkSize=500):
+    # times allocate_many over the same orders for every process count, the time to start
+    # the pool is left out so the curve only shows the allocation work
+    orders = list(orders)
+    results = []
+    for processes in processCounts:
+        with ParallelAllocator(catalog, processes, chunkSize) as parallelAllocator:
+            start = time.perf_counter()
+            parallelAllocator.allocate_many(orders)
+            seconds = time.perf_counter() - start
+
+        results.append({ 'processes': processes, 'seconds': seconds, 'ordersPerSec': len(orders) / seconds })
+
+    for row in results:
+        row['speedup'] = results[0]['seconds'] / row['seconds']
+    return results
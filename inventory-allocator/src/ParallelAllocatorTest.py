@@ -0,0 +1,34 @@
+import unittest
+from Catalog import Catalog
+from InventoryAllocator import InventoryAllocator
+from ParallelAllocator import ParallelAllocator, iter_batches
+
+class ParallelAllocatorTest(unittest.TestCase):
+
+    # shipments from the worker processes come back in the same order as a serial allocation
+    def test_same_shipments_as_serial(self):
+        catalog = Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5, 'orange': 3 } }, { 'name': 'dm', 'inventory': { 'apple': 5 } },
+            { 'name': 'om', 'inventory': { 'apple': 6, 'banana': 2 }} ])
+        orders = [{ 'apple': amount % 13, 'orange': amount % 4, 'banana': amount % 3 } for amount in range(50)]
+
+        with ParallelAllocator(catalog, processes=2, chunkSize=3) as parallelAllocator:
+            shipments = parallelAllocator.allocate_many(orders)
+
+        self.assertEqual(shipments, InventoryAllocator.from_catalog(catalog).allocate_many(orders))
+
+    # workers need a catalog to copy or a snapshot to map, not both and not neither
+    def test_catalog_or_snapshot_required(self):
+        catalog = Catalog([{ 'name': 'owd', 'inventory': { 'apple': 5 } }])
+
+        self.assertRaises(ValueError, ParallelAllocator, processes=1)
+        self.assertRaises(ValueError, ParallelAllocator, catalog, processes=1, snapshotPath='inventory.snap')
+        self.assertRaises(ValueError, InventoryAllocator.from_catalog, None)
+
+    # the last batch holds whatever is left over
+    def test_iter_batches(self):
+        self.assertEqual(list(iter_batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(iter_batches([], 2)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
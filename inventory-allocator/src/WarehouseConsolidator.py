@@ -0,0 +1,107 @@
+import itertools
+import time
+
+"""
+    WarehouseConsolidator allocates a whole order from as few distinct warehouses as possible.
+
+    InventoryAllocator.allocate_inventory optimizes every ordered item on its own, so an order of 20 items
+    can ship from 20 warehouses even if 2 of them hold everything. The consolidator instead looks for the
+    smallest set of warehouses that together hold enough of every ordered item, and among sets of the same
+    size the cheapest one, comparing the cost ranks of their warehouses cheapest first.
+    InventoryAllocator.allocate_consolidated then splits each item across the warehouses of that set only.
+
+    Finding the smallest set is a set cover problem, so the search is bounded:
+        * a greedy pass picks the warehouse covering the most of what is still missing until nothing is,
+          which bounds the size of the best set
+        * sets of 1, 2, ... up to that many warehouses are then tried in cost order, so the first set that
+          covers the order is the best one
+        * the deadline of timeBudget seconds is checked while the candidates are gathered, during the greedy
+          pass and during the search. If it passes during the search the greedy set is used, it covers the
+          order with few warehouses. If it passes before the greedy set is complete the search gives up and
+          the order is allocated by allocate_inventory instead, so the latency of every order stays bounded
+"""
+class WarehouseConsolidator:
+    # how many sets are tried between two checks of the time budget
+    DEADLINE_CHECK_INTERVAL = 256
+
+    def __init__(self, catalog, timeBudget=0.005):
+        self.catalog = catalog
+        self.timeBudget = timeBudget
+
+    def _get_coverage(self, lines, deadline):
+        # coverage['name of warehouse'] = {'name of item': 'amount'} for every warehouse holding any ordered item,
+        # returned as a list of (warehouse, coverage) in cost order, None if the deadline passed first
+        coverage = {}
+        for itemName in lines:
+            if time.perf_counter() > deadline:
+                return None
+            for warehouse, amountInWarehouse in self.catalog.get_distribution(itemName):
+                if amountInWarehouse > 0:
+                    coverage.setdefault(warehouse, {})[itemName] = amountInWarehouse
+        return sorted(coverage.items(), key=lambda candidate: self.catalog.get_warehouse_rank(candidate[0]))
+
+    def _covers(self, candidateSet, lines):
+        for itemName, itemAmount in lines.items():
+            total = 0
+            for warehouse, amounts in candidateSet:
+                total += amounts.get(itemName, 0)
+            if total < itemAmount:
+                return False
+        return True
+
+    def _find_greedy(self, candidates, lines, deadline):
+        # candidates covering lines, picked greedily, in cost order, None if the deadline passed first
+        missing = dict(lines)
+        remaining = list(candidates)
+        chosen = []
+        while missing:
+            best, bestCovered = 0, 0
+            for i, (warehouse, amounts) in enumerate(remaining):
+                # every candidate costs a pass over the missing lines, so the deadline is checked for each
+                if time.perf_counter() > deadline:
+                    return None
+
+                covered = sum(min(itemAmount, amounts.get(itemName, 0)) for itemName, itemAmount in missing.items())
+                if covered > bestCovered:
+                    best, bestCovered = i, covered
+
+            chosen.append(remaining.pop(best))
+            for itemName, amount in chosen[-1][1].items():
+                if itemName in missing:
+                    missing[itemName] -= amount
+                    if missing[itemName] <= 0:
+                        del missing[itemName]
+
+        return sorted(chosen, key=lambda candidate: self.catalog.get_warehouse_rank(candidate[0]))
+
+    def _find_warehouses(self, candidates, lines, deadline):
+        # The cheapest of the smallest sets of candidates covering lines. If the deadline passes during the
+        # search the greedy set, None if it passes before the greedy set is complete
+        greedy = self._find_greedy(candidates, lines, deadline)
+        if greedy is None:
+            return None
+
+        checked = 0
+        for size in range(1, len(greedy) + 1):
+            for candidateSet in itertools.combinations(candidates, size):
+                checked += 1
+                if checked % self.DEADLINE_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                    return [ warehouse for warehouse, amounts in greedy ]
+
+                if self._covers(candidateSet, lines):
+                    return [ warehouse for warehouse, amounts in candidateSet ]
+
+        # only reached when lines is empty, sets as large as the greedy set always include one that covers lines
+        return [ warehouse for warehouse, amounts in greedy ]
+
+    def find_warehouses(self, lines, timeBudget=None):
+        # the set of warehouses to ship lines ({'name of item': 'positive amount'}, every item in the catalog
+        # with enough in total) from, None if the time budget ran out before a set covering lines was found
+        if timeBudget is None:
+            timeBudget = self.timeBudget
+        deadline = time.perf_counter() + timeBudget
+
+        candidates = self._get_coverage(lines, deadline)
+        if candidates is None:
+            return None
+        return self._find_warehouses(candidates, lines, deadline)
@@ -0,0 +1,104 @@
+"""
+    WarehouseSelector picks the fewest warehouses to split an item across. It replaces Heap in the allocator.
+
+    It is the same binary heap as Heap, so it selects exactly the same warehouses, but it is laid out
+    for reuse rather than being rebuilt for every order line:
+        * the heap is two preallocated int arrays, the position of the warehouse in the item's distribution
+          and the amount it holds, instead of a list of (warehouse, amount) tuples
+        * there is no separate orderedMap, the warehouses left at the end are put back in cost order by
+          sorting their positions once, when the split is made
+        * reset() empties the selector in O(1) so a single selector serves every order line
+
+    Items "move up" the heap even if they are equal to their parent but only "move down" if they are greater
+    than their children, so when amounts are the same the rightmost warehouse is removed first. When both
+    children are candidates to move down to, min_child picks the child the same way Heap does, by comparing
+    the (warehouse, amount) pairs, and del_min takes the same amount off the total as Heap does. Both are
+    kept as they are because the expected shipments in InventoryAllocatorTest depend on them.
+"""
+class WarehouseSelector:
+    def __init__(self):
+        # slot 0 is unused so the children of i are i * 2 and i * 2 + 1
+        self.positions = [0]
+        self.amounts = [0]
+        self.currentSize = 0
+
+        self.total = 0 # keeps track of the total of items added to the selector
+        self.distribution = ()
+
+    def reset(self, distribution):
+        self.distribution = distribution
+        self.currentSize = 0
+        self.total = 0
+
+        missing = len(distribution) + 1 - len(self.positions)
+        if missing > 0:
+            self.positions.extend([0] * missing)
+            self.amounts.extend([0] * missing)
+
+    def get_min_amount(self):
+        return self.amounts[1]
+
+    def insert(self, position, amount):
+        positions, amounts = self.positions, self.amounts
+        self.currentSize = i = self.currentSize + 1
+        positions[i] = position
+        amounts[i] = amount
+        self.total += amount
+
+        # perc up
+        while i > 1:
+            parent = i // 2
+            if amounts[i] <= amounts[parent]:
+                positions[i], positions[parent] = positions[parent], positions[i]
+                amounts[i], amounts[parent] = amounts[parent], amounts[i]
+            i = parent
+
+    def min_child(self, i):
+        if i * 2 + 1 > self.currentSize:
+            return i * 2
+        else:
+            left = self.distribution[self.positions[i * 2]][0]
+            right = self.distribution[self.positions[i * 2 + 1]][0]
+            if left < right or (left == right and self.amounts[i * 2] < self.amounts[i * 2 + 1]):
+                return i * 2
+            else:
+                return i * 2 + 1
+
+    def del_min(self):
+        # returns (position, amount) of the warehouse that was removed
+        positions, amounts = self.positions, self.amounts
+        size = self.currentSize
+        retval = positions[1], amounts[1]
+
+        positions[1] = positions[size]
+        amounts[1] = amounts[size]
+        self.currentSize = size = size - 1
+        self.total -= amounts[1]
+
+        # perc down
+        i = 1
+        while (i * 2) <= size:
+            mc = self.min_child(i)
+            if amounts[i] > amounts[mc]:
+                positions[i], positions[mc] = positions[mc], positions[i]
+                amounts[i], amounts[mc] = amounts[mc], amounts[i]
+            i = mc
+        return retval
+
+    def get_split(self, itemAmount):
+        # (warehouse, amount) taken from each warehouse left in the selector to make up itemAmount,
+        # cheapest warehouse first
+        size = self.currentSize
+        remaining = sorted(zip(self.positions[1:size + 1], self.amounts[1:size + 1]))
+
+        split = []
+        total = itemAmount
+        for position, amount in remaining:
+            warehouse = self.distribution[position][0]
+            if total <= amount:
+                split.append((warehouse, total))
+                return split
+            else:
+                total -= amount
+                split.append((warehouse, amount))
+        return split
@@ -0,0 +1,42 @@
+import random
+import unittest
+from Heap import Heap
+from WarehouseSelector import WarehouseSelector
+
+class WarehouseSelectorTest(unittest.TestCase):
+
+    def select(self, selector, distribution, itemAmount):
+        selector.reset(distribution)
+        for index, (warehouse, amount) in enumerate(distribution):
+            selector.insert(index, amount)
+            if selector.total - selector.get_min_amount() >= itemAmount:
+                selector.del_min()
+        return selector.get_split(itemAmount)
+
+    # when amounts are the same the rightmost (most expensive) warehouse is removed first
+    def test_rightmost_removed_first(self):
+        distribution = [('owd', 4), ('dm', 4), ('om', 4)]
+
+        self.assertEqual(self.select(WarehouseSelector(), distribution, 8), [('owd', 4), ('dm', 4)])
+
+    # the selector picks the same warehouses as Heap, also when it is reused for many lines
+    def test_same_split_as_heap(self):
+        rng = random.Random(0)
+        selector = WarehouseSelector()
+
+        for _ in range(500):
+            distribution = [ ('w%d' % rng.randint(0, 99), rng.randint(0, 10)) for _ in range(rng.randint(1, 30)) ]
+            distribution = list(dict(distribution).items())
+            itemAmount = rng.randint(1, sum(amount for _, amount in distribution) + 1)
+
+            distributionHeap = Heap()
+            for warehouse, amount in distribution:
+                distributionHeap.insert((warehouse, amount))
+                if distributionHeap.total - distributionHeap.get_min_child()[1] >= itemAmount:
+                    distributionHeap.del_min()
+
+            self.assertEqual(self.select(selector, distribution, itemAmount), distributionHeap.get_split(itemAmount))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import bisect
+import itertools
+import random
+
+"""
+    Seeded synthetic warehouses and orders for benchmarks.
+
+    Every warehouse stocks itemsPerWarehouse items chosen uniformly at random, 1 to maxAmount of each.
+    Orders have linesPerOrder distinct items, 1 to maxOrderAmount of each. With skew 0 every item is as
+    likely to be ordered as any other, otherwise the popularity of items follows a Zipf law of that exponent,
+    item0 being the most popular, so a skew around 1 gives the few best sellers most of the traffic.
+
+    The same parameters and seed always give the same warehouses and orders.
+"""
+class WorkloadGenerator:
+    def __init__(self, warehouseCount, itemCount, itemsPerWarehouse, linesPerOrder=5, skew=0.0, maxAmount=20, maxOrderAmount=30, seed=0):
+        self.warehouseCount = warehouseCount
+        self.itemCount = itemCount
+        self.itemsPerWarehouse = min(itemsPerWarehouse, itemCount)
+        self.linesPerOrder = min(linesPerOrder, itemCount)
+        self.skew = skew
+        self.maxAmount = maxAmount
+        self.maxOrderAmount = maxOrderAmount
+        self.seed = seed
+
+        self.itemNames = [ 'item%d' % i for i in range(itemCount) ]
+
+        # cumulativeWeights[i] = sum of the popularity of item0 up to item i
+        self.cumulativeWeights = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(itemCount)))
+
+    def generate_warehouses(self):
+        rng = random.Random(self.seed)
+
+        warehouseDistributionList = []
+        for i in range(self.warehouseCount):
+            inventory = { itemName: rng.randint(1, self.maxAmount) for itemName in rng.sample(self.itemNames, self.itemsPerWarehouse) }
+            warehouseDistributionList.append({ 'name': 'w%d' % i, 'inventory': inventory })
+        return warehouseDistributionList
+
+    def _choose_items(self, rng):
+        if self.skew == 0:
+            return rng.sample(self.itemNames, self.linesPerOrder)
+
+        # draws by popularity until there are enough distinct items
+        itemNames = []
+        while len(itemNames) < self.linesPerOrder:
+            itemName = self.itemNames[bisect.bisect(self.cumulativeWeights, rng.random() * self.cumulativeWeights[-1])]
+            if not (itemName in itemNames):
+                itemNames.append(itemName)
+        return itemNames
+
+    def generate_orders(self, orderCount):
+        rng = random.Random(self.seed + 1)
+        return [ { itemName: rng.randint(1, self.maxOrderAmount) for itemName in self._choose_items(rng) } for _ in range(orderCount) ]
@@ -0,0 +1,37 @@
+import unittest
+from WorkloadGenerator import WorkloadGenerator
+
+class WorkloadGeneratorTest(unittest.TestCase):
+
+    # the same parameters and seed give the same warehouses and orders, another seed does not
+    def test_seeded(self):
+        workload = WorkloadGenerator(20, 100, 10, linesPerOrder=3, skew=1.0)
+
+        self.assertEqual(workload.generate_warehouses(), WorkloadGenerator(20, 100, 10, 3, 1.0).generate_warehouses())
+        self.assertEqual(workload.generate_orders(50), WorkloadGenerator(20, 100, 10, 3, 1.0).generate_orders(50))
+        self.assertNotEqual(workload.generate_orders(50), WorkloadGenerator(20, 100, 10, 3, 1.0, seed=1).generate_orders(50))
+
+    # warehouses and orders have the requested shape
+    def test_shape(self):
+        workload = WorkloadGenerator(20, 100, 10, linesPerOrder=3, maxAmount=5, maxOrderAmount=7)
+
+        warehouseDistributionList = workload.generate_warehouses()
+        orders = workload.generate_orders(50)
+
+        self.assertEqual([ inventoryDistribution['name'] for inventoryDistribution in warehouseDistributionList ], [ 'w%d' % i for i in range(20) ])
+        self.assertTrue(all(len(inventoryDistribution['inventory']) == 10 for inventoryDistribution in warehouseDistributionList))
+        self.assertTrue(all(1 <= amount <= 5 for inventoryDistribution in warehouseDistributionList for amount in inventoryDistribution['inventory'].values()))
+        self.assertTrue(all(len(order) == 3 and all(1 <= amount <= 7 for amount in order.values()) for order in orders))
+
+    # with skew the most popular items take most of the lines
+    def test_skew(self):
+        def popular_share(skew):
+            orders = WorkloadGenerator(1, 1000, 1, linesPerOrder=1, skew=skew).generate_orders(2000)
+            return sum(1 for order in orders if 'item0' in order or 'item1' in order) / len(orders)
+
+        self.assertLess(popular_share(0.0), 0.05)
+        self.assertGreater(popular_share(1.2), 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()